@@ -6,19 +6,88 @@ Advanced analytics dashboard for visualizing memory patterns and insights
 """
 
 import json
+import os
 import asyncio
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, asdict
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
 import time
 import logging
-from collections import defaultdict, Counter
-import statistics
+from collections import defaultdict, deque, Counter
 from datetime import datetime, timedelta
 
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from .memory_engine import MemoryColumns
+except ImportError:
+    from memory_engine import MemoryColumns
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+
+def _value_counts(values: np.ndarray, top: Optional[int] = None) -> Dict[Any, int]:
+    """Count occurrences in a column, ordered like ``Counter.most_common``
+    (by count, ties broken by first appearance) when ``top`` is given and
+    by first appearance otherwise."""
+    # Counter rather than np.unique, which sorts and so fails on mixed types
+    counts = Counter(values.tolist())
+    return dict(counts.most_common(top)) if top is not None else dict(counts)
+
+
+# Reported for engines that do not publish a ``perf`` snapshot
+_MEMORY_PERF_DEFAULTS = {
+    'cache_hit_rate': 0,
+    'average_search_time': 0,
+    'storage_efficiency': 0,
+    'index_size': 0
+}
+
+_TASK_PERF_DEFAULTS = {
+    'average_task_time': 0,
+    'plugin_load_time': 0,
+    'queue_length': 0,
+    'active_threads': 0
+}
+
+# Disk fullness changes slowly, so it is re-read less often than CPU/memory
+_DISK_USAGE_TTL = 30
+
+
+def _perf_snapshot(engine: Any, defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy the performance counters an engine maintains on ``engine.perf``"""
+    perf = getattr(engine, 'perf', None)
+    return asdict(perf) if perf is not None else dict(defaults)
+
+
+@lru_cache(maxsize=1)
+def _system_performance(time_bucket: int) -> Dict[str, float]:
+    """System resource readings, cached per one-second ``time_bucket``"""
+    import psutil
+    return {
+        'cpu_usage': psutil.cpu_percent(),
+        'memory_usage': psutil.virtual_memory().percent,
+        'disk_usage': _disk_usage_percent(os.path.realpath('.'), time_bucket // _DISK_USAGE_TTL),
+        'load_average': psutil.getloadavg()[0] if hasattr(psutil, 'getloadavg') else 0
+    }
+
+
+@lru_cache(maxsize=8)
+def _disk_usage_percent(path: str, time_bucket: int) -> float:
+    """Disk usage for ``path``, cached per ``_DISK_USAGE_TTL`` bucket"""
+    import psutil
+    return psutil.disk_usage(path).percent
+
+
+@dataclass(slots=True)
 class MemoryStats:
     """Statistics about memory usage and patterns"""
     total_memories: int
@@ -30,7 +99,7 @@ class MemoryStats:
     access_patterns: Dict[str, int]
     tag_frequency: Dict[str, int]
 
-@dataclass
+@dataclass(slots=True)
 class TaskStats:
     """Statistics about task execution and performance"""
     total_tasks: int
@@ -42,7 +111,7 @@ class TaskStats:
     workspace_activity: Dict[str, int]
     performance_trends: List[Dict[str, Any]]
 
-@dataclass
+@dataclass(slots=True)
 class DashboardData:
     """Complete dashboard data"""
     memory_stats: MemoryStats
@@ -52,6 +121,272 @@ class DashboardData:
     recommendations: List[Dict[str, Any]]
     last_updated: float
 
+# Recommendation rules as (predicate, template) pairs, evaluated in order.
+# Predicates take (memory_stats, task_stats, system_perf, graph_metrics);
+# templates are built once and copied only when their rule fires, with
+# ``description`` formatted against the triggering stats.
+_RECOMMENDATION_RULES = (
+    # Memory recommendations
+    (lambda m, t, sys_perf, graph: m.total_memories > 1000, MappingProxyType({
+        'type': 'memory_optimization',
+        'priority': 'high',
+        'title': 'Memory Storage Optimization',
+        'description': 'You have over 1000 memories. Consider archiving old or rarely accessed memories.',
+        'action': 'archive_old_memories',
+        'impact': 'Improved search performance and reduced storage usage'
+    })),
+    (lambda m, t, sys_perf, graph: m.average_size > 10000, MappingProxyType({  # Large memories
+        'type': 'memory_size',
+        'priority': 'medium',
+        'title': 'Large Memory Detection',
+        'description': 'Some memories are unusually large. Consider breaking them into smaller chunks.',
+        'action': 'split_large_memories',
+        'impact': 'Better memory organization and faster retrieval'
+    })),
+    # Task recommendations
+    (lambda m, t, sys_perf, graph: t.success_rate < 80, MappingProxyType({
+        'type': 'task_reliability',
+        'priority': 'high',
+        'title': 'Task Success Rate Low',
+        'description': 'Task success rate is {task_stats.success_rate:.1f}%. Review failed tasks and improve error handling.',
+        'action': 'review_failed_tasks',
+        'impact': 'Increased automation reliability'
+    })),
+    (lambda m, t, sys_perf, graph: t.average_execution_time > 30, MappingProxyType({  # Slow tasks
+        'type': 'task_performance',
+        'priority': 'medium',
+        'title': 'Slow Task Execution',
+        'description': 'Tasks are taking longer than expected. Consider optimizing plugins or splitting complex tasks.',
+        'action': 'optimize_task_performance',
+        'impact': 'Faster task completion and better user experience'
+    })),
+    # Performance recommendations
+    (lambda m, t, sys_perf, graph: sys_perf.get('memory_usage', 0) > 80, MappingProxyType({
+        'type': 'system_resources',
+        'priority': 'high',
+        'title': 'High Memory Usage',
+        'description': 'System memory usage is high. Consider closing other applications or upgrading hardware.',
+        'action': 'optimize_memory_usage',
+        'impact': 'Better system performance and stability'
+    })),
+    # Knowledge graph recommendations
+    (lambda m, t, sys_perf, graph: graph.get('density', 0) < 0.1, MappingProxyType({
+        'type': 'knowledge_graph',
+        'priority': 'low',
+        'title': 'Sparse Knowledge Graph',
+        'description': 'Your knowledge graph has low connectivity. Add more relationships between memories and tasks.',
+        'action': 'enhance_knowledge_connections',
+        'impact': 'Better insight discovery and pattern recognition'
+    })),
+)
+
+
+class _TrendSeries:
+    """Per-refresh scalar time series stored as parallel float64 columns
+    
+    Rows of ``_data`` are (last_updated, total_memories, success_rate,
+    cpu_usage, memory_usage); columns are refreshes in time order. The
+    live region is ``[_start, _end)`` and capacity doubles when full.
+    """
+    
+    def __init__(self, capacity: int = 64):
+        self._data = np.empty((5, capacity), dtype=np.float64)
+        self._start = 0
+        self._end = 0
+    
+    def append(self, *values: float) -> None:
+        if self._end == self._data.shape[1]:
+            live = self._end - self._start
+            capacity = self._data.shape[1] * (2 if live * 2 > self._data.shape[1] else 1)
+            data = np.empty((5, capacity), dtype=np.float64)
+            data[:, :live] = self._data[:, self._start:self._end]
+            self._data, self._start, self._end = data, 0, live
+        
+        self._data[:, self._end] = values
+        self._end += 1
+    
+    def window(self, cutoff_time: float) -> np.ndarray:
+        """Columns for refreshes newer than ``cutoff_time`` (a view)"""
+        live = self._data[:, self._start:self._end]
+        return live[:, np.searchsorted(live[0], cutoff_time, side='right'):]
+    
+    def expire(self, cutoff_time: float) -> None:
+        """Drop refreshes at or before ``cutoff_time``"""
+        self._start += int(np.searchsorted(self._data[0, self._start:self._end], cutoff_time, side='right'))
+
+
+def _memory_stats(columns: MemoryColumns, total_memories: Optional[int] = None) -> MemoryStats:
+    """Memory statistics for a set of columns
+    
+    When ``columns`` is a sample of ``total_memories`` memories, counts are
+    scaled up by the sampling ratio; sizes and rates use the sample mean.
+    """
+    count = len(columns)
+    if not count:
+        return MemoryStats(
+            total_memories=0,
+            active_memories=0,
+            memory_types={},
+            workspace_distribution={},
+            average_size=0,
+            growth_rate=0,
+            access_patterns={},
+            tag_frequency={}
+        )
+    
+    if total_memories is None:
+        total_memories = count
+    scale = total_memories / count
+    
+    def scaled(counts: Dict[Any, int]) -> Dict[Any, int]:
+        return counts if scale == 1 else {k: round(v * scale) for k, v in counts.items()}
+    
+    current_time = time.time()
+    week_ago = current_time - (7 * 24 * 3600)
+    
+    # Each aggregation touches a single contiguous column
+    memory_types = _value_counts(columns.types)
+    workspace_distribution = _value_counts(columns.workspaces)
+    tag_frequency = _value_counts(columns.tags_values, top=10)
+    
+    # Access patterns
+    active_count = int(np.count_nonzero(columns.last_accessed > week_ago))
+    
+    # Determine access frequency
+    access_counts = columns.access_count
+    frequency = np.select(
+        [access_counts > 10, access_counts > 3], ['frequent', 'moderate'], 'rare'
+    )
+    access_patterns = _value_counts(frequency)
+    
+    # Calculate growth rate
+    growth_rate = 0
+    if total_memories > 1:
+        growth_rate = int(np.count_nonzero(columns.created_at > week_ago)) * scale / 7  # memories per day
+    
+    return MemoryStats(
+        total_memories=total_memories,
+        active_memories=round(active_count * scale),
+        memory_types=scaled(memory_types),
+        workspace_distribution=scaled(workspace_distribution),
+        average_size=float(columns.sizes.mean()),
+        growth_rate=growth_rate,
+        access_patterns=scaled(access_patterns),
+        tag_frequency=scaled(tag_frequency)
+    )
+
+
+class _MemoryAggregates:
+    """Running memory statistics maintained one stored memory at a time
+    
+    Counters only grow. The one-week activity and growth windows are
+    deques of timestamps expired from the left, so rows must arrive in
+    time order, as newly stored memories do.
+    """
+    
+    def __init__(self):
+        self.count = 0
+        self.size_sum = 0
+        self.types: Dict[str, int] = {}
+        self.workspaces: Dict[str, int] = {}
+        self.frequency: Dict[str, int] = {}
+        self.tags: Counter = Counter()
+        self._accessed: Deque[float] = deque()
+        self._created: Deque[float] = deque()
+    
+    def seed(self, columns: MemoryColumns) -> None:
+        """Load an initial scan, ordered by creation time"""
+        for i in np.argsort(columns.created_at, kind='stable').tolist():
+            self.add(columns[i])
+        self._accessed = deque(sorted(self._accessed))
+    
+    def add(self, row: Dict[str, Any]) -> None:
+        self.count += 1
+        self.size_sum += row['size']
+        self.types[row['type']] = self.types.get(row['type'], 0) + 1
+        self.workspaces[row['workspace']] = self.workspaces.get(row['workspace'], 0) + 1
+        self.tags.update(row['tags'])
+        
+        access_count = row['access_count']
+        bucket = 'frequent' if access_count > 10 else 'moderate' if access_count > 3 else 'rare'
+        self.frequency[bucket] = self.frequency.get(bucket, 0) + 1
+        
+        self._accessed.append(row['last_accessed'])
+        self._created.append(row['created_at'])
+    
+    def snapshot(self, current_time: float) -> MemoryStats:
+        week_ago = current_time - (7 * 24 * 3600)
+        for window in (self._accessed, self._created):
+            while window and window[0] <= week_ago:
+                window.popleft()
+        
+        return MemoryStats(
+            total_memories=self.count,
+            active_memories=len(self._accessed),
+            memory_types=dict(self.types),
+            workspace_distribution=dict(self.workspaces),
+            average_size=(self.size_sum / self.count) if self.count else 0,
+            growth_rate=(len(self._created) / 7) if self.count > 1 else 0,
+            access_patterns=dict(self.frequency),
+            tag_frequency=dict(self.tags.most_common(10))
+        )
+
+
+class _TaskAggregates:
+    """Running task counters folded over an append-only execution history
+    
+    Each fold only visits entries appended since the previous one; a
+    replaced or shortened history list starts the counters over.
+    """
+    
+    def __init__(self):
+        self._reset(None)
+    
+    def _reset(self, history: Optional[List[Dict[str, Any]]]) -> None:
+        self.history = history
+        self.consumed = 0
+        self.completed = 0
+        self.failed = 0
+        self.execution_time_sum = 0
+        self.plugin_usage: Dict[str, int] = {}
+        self.workspace_activity: Dict[str, int] = {}
+    
+    def fold(self, task_history: List[Dict[str, Any]]) -> None:
+        if task_history is not self.history or len(task_history) < self.consumed:
+            self._reset(task_history)
+        
+        plugin_usage = self.plugin_usage
+        workspace_activity = self.workspace_activity
+        plugin_get = plugin_usage.get
+        workspace_get = workspace_activity.get
+        
+        for task in task_history[self.consumed:]:
+            task_get = task.get
+            status = task_get('status', 'unknown')
+            if status == 'completed':
+                self.completed += 1
+            elif status == 'failed':
+                self.failed += 1
+            
+            plugin = task_get('plugin', 'unknown')
+            plugin_usage[plugin] = plugin_get(plugin, 0) + 1
+            
+            self.execution_time_sum += task_get('execution_time', 0)
+            
+            workspace = task_get('workspace', 'unknown')
+            workspace_activity[workspace] = workspace_get(workspace, 0) + 1
+        
+        self.consumed = len(task_history)
+
+
+def _branch_result(result: Any, fallback: Any, branch: str) -> Any:
+    """Unwrap one ``asyncio.gather`` result, substituting ``fallback`` on failure"""
+    if isinstance(result, BaseException):
+        logger.error(f"Error in {branch} analytics: {result}")
+        return fallback
+    return result
+
+
 class MemoryAnalytics:
     """Advanced analytics for NeuroForge memory system"""
     
@@ -59,90 +394,48 @@ class MemoryAnalytics:
         self.memory_engine = memory_engine
         self.task_agent = task_agent
         self.knowledge_graph = knowledge_graph
-        self.analytics_history: List[DashboardData] = []
+        self.analytics_history: Deque[DashboardData] = deque()
+        self._trend_series = _TrendSeries()
+        self._memory_aggregates: Optional[_MemoryAggregates] = None
+        self._task_aggregates = _TaskAggregates()
+        
+    async def _memory_columns(self, limit: int = 1000) -> MemoryColumns:
+        """Fetch memories in columnar form, adapting record-based engines"""
+        search_columns = getattr(self.memory_engine, 'search_memories_columns', None)
+        if search_columns is not None:
+            return await search_columns("", limit=limit)
+        
+        records = await self.memory_engine.search_memories("", limit=limit)
+        return MemoryColumns.from_records(records or [])
+    
+    async def analyze_memory_patterns(self, sample_size: int = 2000) -> MemoryStats:
+        """Analyze memory usage patterns and trends
         
-    async def analyze_memory_patterns(self) -> MemoryStats:
-        """Analyze memory usage patterns and trends"""
+        Corpora larger than ``10 * sample_size`` are estimated from a random
+        sample when the engine supports ``sample_memories``.
+        """
         try:
-            # Get all memories
-            all_memories = await self.memory_engine.search_memories("", limit=1000)
-            
-            if not all_memories:
-                return MemoryStats(
-                    total_memories=0,
-                    active_memories=0,
-                    memory_types={},
-                    workspace_distribution={},
-                    average_size=0,
-                    growth_rate=0,
-                    access_patterns={},
-                    tag_frequency={}
-                )
-            
-            # Analyze memory types
-            memory_types = Counter()
-            workspace_distribution = Counter()
-            sizes = []
-            access_patterns = Counter()
-            tag_frequency = Counter()
-            creation_times = []
-            
-            current_time = time.time()
-            week_ago = current_time - (7 * 24 * 3600)
-            active_count = 0
+            if self._memory_aggregates is not None:
+                return self._memory_aggregates.snapshot(time.time())
             
-            for memory in all_memories:
-                # Memory type analysis
-                memory_type = memory.get('type', 'unknown')
-                memory_types[memory_type] += 1
-                
-                # Workspace distribution
-                workspace = memory.get('workspace', 'unknown')
-                workspace_distribution[workspace] += 1
-                
-                # Size analysis
-                content_size = len(str(memory.get('content', '')))
-                sizes.append(content_size)
-                
-                # Access patterns
-                last_accessed = memory.get('last_accessed', 0)
-                if last_accessed > week_ago:
-                    active_count += 1
-                    
-                # Determine access frequency
-                access_count = memory.get('access_count', 0)
-                if access_count > 10:
-                    access_patterns['frequent'] += 1
-                elif access_count > 3:
-                    access_patterns['moderate'] += 1
-                else:
-                    access_patterns['rare'] += 1
-                
-                # Tag analysis
-                tags = memory.get('tags', [])
-                for tag in tags:
-                    tag_frequency[tag] += 1
-                
-                # Creation time for growth analysis
-                created_at = memory.get('created_at', current_time)
-                creation_times.append(created_at)
+            # Very large corpora are estimated from a sample
+            index_size = _perf_snapshot(self.memory_engine, _MEMORY_PERF_DEFAULTS)['index_size']
+            sample_memories = getattr(self.memory_engine, 'sample_memories', None)
+            if sample_memories is not None and index_size > 10 * sample_size:
+                return _memory_stats(await sample_memories(k=sample_size), total_memories=index_size)
             
-            # Calculate growth rate
-            growth_rate = 0
-            if len(creation_times) > 1:
-                recent_memories = [t for t in creation_times if t > week_ago]
-                growth_rate = len(recent_memories) / 7  # memories per day
+            # Engines that publish stored memories are scanned once, then
+            # followed incrementally
+            add_listener = getattr(self.memory_engine, 'add_listener', None)
+            if add_listener is not None:
+                aggregates = _MemoryAggregates()
+                aggregates.seed(await self._memory_columns(limit=max(1000, index_size)))
+                add_listener(aggregates.add)
+                self._memory_aggregates = aggregates
+                return aggregates.snapshot(time.time())
             
-            return MemoryStats(
-                total_memories=len(all_memories),
-                active_memories=active_count,
-                memory_types=dict(memory_types),
-                workspace_distribution=dict(workspace_distribution),
-                average_size=statistics.mean(sizes) if sizes else 0,
-                growth_rate=growth_rate,
-                access_patterns=dict(access_patterns),
-                tag_frequency=dict(tag_frequency.most_common(10))
-            )
+            # Get all memories
+            return _memory_stats(await self._memory_columns())
             
         except Exception as e:
             logger.error(f"Error analyzing memory patterns: {e}")
@@ -167,108 +460,88 @@ class MemoryAnalytics:
                     performance_trends=[]
                 )
             
-            total_tasks = len(task_history)
-            completed_tasks = 0
-            failed_tasks = 0
-            plugin_usage = Counter()
-            execution_times = []
-            workspace_activity = Counter()
+            # Only history appended since the last call is visited
+            aggregates = self._task_aggregates
+            aggregates.fold(task_history)
+            total_tasks = aggregates.consumed
+            completed_tasks = aggregates.completed
+            failed_tasks = aggregates.failed
             performance_trends = []
             
-            # Analyze tasks
-            for task in task_history:
-                status = task.get('status', 'unknown')
-                if status == 'completed':
-                    completed_tasks += 1
-                elif status == 'failed':
-                    failed_tasks += 1
-                
-                # Plugin usage
-                plugin = task.get('plugin', 'unknown')
-                plugin_usage[plugin] += 1
-                
-                # Execution time
-                exec_time = task.get('execution_time', 0)
-                execution_times.append(exec_time)
-                
-                # Workspace activity
-                workspace = task.get('workspace', 'unknown')
-                workspace_activity[workspace] += 1
-            
             # Calculate success rate
             success_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
             
             # Generate performance trends (daily stats for last week)
+            # With creation times sorted, each day window is a pair of binary
+            # searches and a difference of completed-count prefix sums
+            created, completed = self._sorted_task_history(task_history)
+            completed_prefix = np.concatenate(([0], np.cumsum(completed)))
+            
             current_time = time.time()
+            day_starts = current_time - np.arange(7) * (24 * 3600)
+            lo = np.searchsorted(created, day_starts, side='left')
+            hi = np.searchsorted(created, day_starts + 24 * 3600, side='left')
+            day_totals = (hi - lo).tolist()
+            day_completed = (completed_prefix[hi] - completed_prefix[lo]).tolist()
+            days = [time.strftime('%Y-%m-%d', time.localtime(day_start))
+                    for day_start in day_starts.tolist()]
+            
             for i in range(7):
-                day_start = current_time - (i * 24 * 3600)
-                day_end = day_start + 24 * 3600
-                
-                day_tasks = [
-                    task for task in task_history
-                    if day_start <= task.get('created_at', 0) < day_end
-                ]
-                
-                day_completed = len([
-                    task for task in day_tasks
-                    if task.get('status') == 'completed'
-                ])
-                
                 performance_trends.append({
-                    'date': datetime.fromtimestamp(day_start).strftime('%Y-%m-%d'),
-                    'tasks_completed': day_completed,
-                    'total_tasks': len(day_tasks),
-                    'success_rate': (day_completed / len(day_tasks) * 100) if day_tasks else 0
+                    'date': days[i],
+                    'tasks_completed': day_completed[i],
+                    'total_tasks': day_totals[i],
+                    'success_rate': (day_completed[i] / day_totals[i] * 100) if day_totals[i] else 0
                 })
             
             return TaskStats(
                 total_tasks=total_tasks,
                 completed_tasks=completed_tasks,
                 failed_tasks=failed_tasks,
-                plugin_usage=dict(plugin_usage),
+                plugin_usage=dict(aggregates.plugin_usage),
                 success_rate=success_rate,
-                average_execution_time=statistics.mean(execution_times) if execution_times else 0,
-                workspace_activity=dict(workspace_activity),
+                average_execution_time=aggregates.execution_time_sum / total_tasks,
+                workspace_activity=dict(aggregates.workspace_activity),
                 performance_trends=performance_trends
             )
             
         except Exception as e:
             logger.error(f"Error analyzing task performance: {e}")
+            self._task_aggregates = _TaskAggregates()
             return TaskStats(0, 0, 0, {}, 0, 0, {}, [])
     
+    def _sorted_task_history(self, task_history: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Task creation times (ascending) and a parallel completed mask
+        
+        Uses the task agent's sorted columnar history when it is available
+        and in sync with ``task_history``; otherwise builds and sorts it.
+        """
+        created = getattr(self.task_agent, 'history_created', None)
+        status = getattr(self.task_agent, 'history_status', None)
+        if created is not None and status is not None and len(created) == len(task_history):
+            return created, status == 'completed'
+        
+        created = np.fromiter(
+            (task.get('created_at', 0) for task in task_history),
+            dtype=np.float64, count=len(task_history)
+        )
+        completed = np.fromiter(
+            (task.get('status') == 'completed' for task in task_history),
+            dtype=np.bool_, count=len(task_history)
+        )
+        order = np.argsort(created, kind='stable')
+        return created[order], completed[order]
+    
     def generate_performance_metrics(self) -> Dict[str, Any]:
         """Generate system performance metrics"""
         try:
-            # Memory engine performance
-            memory_performance = {
-                'cache_hit_rate': getattr(self.memory_engine, 'cache_hit_rate', 0),
-                'average_search_time': getattr(self.memory_engine, 'average_search_time', 0),
-                'storage_efficiency': getattr(self.memory_engine, 'storage_efficiency', 0),
-                'index_size': getattr(self.memory_engine, 'index_size', 0)
-            }
-            
-            # Task agent performance
-            task_performance = {
-                'average_task_time': getattr(self.task_agent, 'average_execution_time', 0),
-                'plugin_load_time': getattr(self.task_agent, 'plugin_load_time', 0),
-                'queue_length': getattr(self.task_agent, 'queue_length', 0),
-                'active_threads': getattr(self.task_agent, 'active_threads', 0)
-            }
-            
-            # System resources
-            import psutil
-            system_performance = {
-                'cpu_usage': psutil.cpu_percent(),
-                'memory_usage': psutil.virtual_memory().percent,
-                'disk_usage': psutil.disk_usage('.').percent,
-                'load_average': psutil.getloadavg()[0] if hasattr(psutil, 'getloadavg') else 0
-            }
+            current_time = time.time()
             
             return {
-                'memory_engine': memory_performance,
-                'task_agent': task_performance,
-                'system': system_performance,
-                'timestamp': time.time()
+                'memory_engine': _perf_snapshot(self.memory_engine, _MEMORY_PERF_DEFAULTS),
+                'task_agent': _perf_snapshot(self.task_agent, _TASK_PERF_DEFAULTS),
+                'system': dict(_system_performance(int(current_time))),
+                'timestamp': current_time
             }
             
         except Exception as e:
@@ -280,75 +553,20 @@ class MemoryAnalytics:
                 'timestamp': time.time()
             }
     
-    def generate_recommendations(self, memory_stats: MemoryStats, task_stats: TaskStats, performance_metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def generate_recommendations(self, memory_stats: MemoryStats, task_stats: TaskStats, performance_metrics: Dict[str, Any],
+                                 kg_stats: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Generate actionable recommendations based on analytics"""
-        recommendations = []
-        
-        # Memory recommendations
-        if memory_stats.total_memories > 1000:
-            recommendations.append({
-                'type': 'memory_optimization',
-                'priority': 'high',
-                'title': 'Memory Storage Optimization',
-                'description': 'You have over 1000 memories. Consider archiving old or rarely accessed memories.',
-                'action': 'archive_old_memories',
-                'impact': 'Improved search performance and reduced storage usage'
-            })
-        
-        if memory_stats.average_size > 10000:  # Large memories
-            recommendations.append({
-                'type': 'memory_size',
-                'priority': 'medium',
-                'title': 'Large Memory Detection',
-                'description': 'Some memories are unusually large. Consider breaking them into smaller chunks.',
-                'action': 'split_large_memories',
-                'impact': 'Better memory organization and faster retrieval'
-            })
-        
-        # Task recommendations
-        if task_stats.success_rate < 80:
-            recommendations.append({
-                'type': 'task_reliability',
-                'priority': 'high',
-                'title': 'Task Success Rate Low',
-                'description': f'Task success rate is {task_stats.success_rate:.1f}%. Review failed tasks and improve error handling.',
-                'action': 'review_failed_tasks',
-                'impact': 'Increased automation reliability'
-            })
-        
-        if task_stats.average_execution_time > 30:  # Slow tasks
-            recommendations.append({
-                'type': 'task_performance',
-                'priority': 'medium',
-                'title': 'Slow Task Execution',
-                'description': 'Tasks are taking longer than expected. Consider optimizing plugins or splitting complex tasks.',
-                'action': 'optimize_task_performance',
-                'impact': 'Faster task completion and better user experience'
-            })
-        
-        # Performance recommendations
         system_perf = performance_metrics.get('system', {})
-        if system_perf.get('memory_usage', 0) > 80:
-            recommendations.append({
-                'type': 'system_resources',
-                'priority': 'high',
-                'title': 'High Memory Usage',
-                'description': 'System memory usage is high. Consider closing other applications or upgrading hardware.',
-                'action': 'optimize_memory_usage',
-                'impact': 'Better system performance and stability'
-            })
+        graph_metrics = kg_stats.get('graph_metrics', {})
         
-        # Knowledge graph recommendations
-        kg_stats = self.knowledge_graph.analyze_graph()
-        if kg_stats.get('graph_metrics', {}).get('density', 0) < 0.1:
-            recommendations.append({
-                'type': 'knowledge_graph',
-                'priority': 'low',
-                'title': 'Sparse Knowledge Graph',
-                'description': 'Your knowledge graph has low connectivity. Add more relationships between memories and tasks.',
-                'action': 'enhance_knowledge_connections',
-                'impact': 'Better insight discovery and pattern recognition'
-            })
+        recommendations = []
+        for applies, template in _RECOMMENDATION_RULES:
+            if applies(memory_stats, task_stats, system_perf, graph_metrics):
+                recommendation = dict(template)
+                recommendation['description'] = template['description'].format(
+                    memory_stats=memory_stats, task_stats=task_stats
+                )
+                recommendations.append(recommendation)
         
         return recommendations
     
@@ -357,12 +575,25 @@ class MemoryAnalytics:
         try:
             logger.info("Generating dashboard data...")
             
-            # Gather all analytics
-            memory_stats = await self.analyze_memory_patterns()
-            task_stats = await self.analyze_task_performance()
-            performance_metrics = self.generate_performance_metrics()
-            knowledge_graph_stats = self.knowledge_graph.analyze_graph()
-            recommendations = self.generate_recommendations(memory_stats, task_stats, performance_metrics)
+            # Gather all analytics; the branches are independent, so run them
+            # concurrently with the synchronous ones off the event loop
+            results = await asyncio.gather(
+                self.analyze_memory_patterns(),
+                self.analyze_task_performance(),
+                asyncio.to_thread(self.generate_performance_metrics),
+                asyncio.to_thread(self.knowledge_graph.analyze_graph),
+                return_exceptions=True
+            )
+            memory_stats = _branch_result(results[0], MemoryStats(0, 0, {}, {}, 0, 0, {}, {}), "memory")
+            task_stats = _branch_result(results[1], TaskStats(0, 0, 0, {}, 0, 0, {}, []), "task")
+            performance_metrics = _branch_result(
+                results[2], {'memory_engine': {}, 'task_agent': {}, 'system': {}, 'timestamp': time.time()},
+                "performance"
+            )
+            knowledge_graph_stats = _branch_result(results[3], {}, "knowledge graph")
+            recommendations = self.generate_recommendations(
+                memory_stats, task_stats, performance_metrics, knowledge_graph_stats
+            )
             
             dashboard_data = DashboardData(
                 memory_stats=memory_stats,
@@ -375,13 +606,22 @@ class MemoryAnalytics:
             
             # Store in history
             self.analytics_history.append(dashboard_data)
+            system_perf = performance_metrics.get('system', {})
+            self._trend_series.append(
+                dashboard_data.last_updated,
+                memory_stats.total_memories,
+                task_stats.success_rate,
+                system_perf.get('cpu_usage', 0),
+                system_perf.get('memory_usage', 0)
+            )
             
-            # Keep only last 30 days of history
+            # Keep only last 30 days of history; entries are appended in time
+            # order, so expired ones are always at the left end
             cutoff_time = time.time() - (30 * 24 * 3600)
-            self.analytics_history = [
-                data for data in self.analytics_history
-                if data.last_updated > cutoff_time
-            ]
+            history = self.analytics_history
+            while history and history[0].last_updated <= cutoff_time:
+                history.popleft()
+            self._trend_series.expire(cutoff_time)
             
             logger.info("Dashboard data generated successfully")
             return dashboard_data
@@ -398,20 +638,16 @@ class MemoryAnalytics:
         
         file_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Convert dashboard data to JSON-serializable format
-        export_data = []
-        for dashboard_data in self.analytics_history:
-            export_data.append({
-                'memory_stats': dashboard_data.memory_stats.__dict__,
-                'task_stats': dashboard_data.task_stats.__dict__,
-                'knowledge_graph_stats': dashboard_data.knowledge_graph_stats,
-                'performance_metrics': dashboard_data.performance_metrics,
-                'recommendations': dashboard_data.recommendations,
-                'last_updated': dashboard_data.last_updated
-            })
-        
-        with open(file_path, 'w') as f:
-            json.dump(export_data, f, indent=2)
+        if ORJSON_AVAILABLE:
+            # orjson serializes the dataclasses and numpy values natively
+            file_path.write_bytes(orjson.dumps(
+                list(self.analytics_history),
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            ))
+        else:
+            export_data = [asdict(dashboard_data) for dashboard_data in self.analytics_history]
+            with open(file_path, 'w') as f:
+                json.dump(export_data, f, indent=2)
         
         logger.info(f"Analytics exported to {file_path}")
         return file_path
@@ -419,33 +655,21 @@ class MemoryAnalytics:
     def get_trend_analysis(self, days: int = 7) -> Dict[str, Any]:
         """Analyze trends over specified number of days"""
         cutoff_time = time.time() - (days * 24 * 3600)
-        recent_data = [
-            data for data in self.analytics_history
-            if data.last_updated > cutoff_time
-        ]
+        _, memory_counts, task_success_rates, cpu_usages, memory_usages = self._trend_series.window(cutoff_time)
+        data_points = len(memory_counts)
         
-        if len(recent_data) < 2:
+        if data_points < 2:
             return {"status": "insufficient_data", "message": "Need at least 2 data points for trend analysis"}
         
         # Memory trends
-        memory_counts = [data.memory_stats.total_memories for data in recent_data]
-        memory_growth = memory_counts[-1] - memory_counts[0] if len(memory_counts) > 1 else 0
+        memory_growth = int(memory_counts[-1] - memory_counts[0])
         
         # Task trends
-        task_success_rates = [data.task_stats.success_rate for data in recent_data]
-        success_rate_trend = task_success_rates[-1] - task_success_rates[0] if len(task_success_rates) > 1 else 0
-        
-        # Performance trends
-        cpu_usages = []
-        memory_usages = []
-        for data in recent_data:
-            system_perf = data.performance_metrics.get('system', {})
-            cpu_usages.append(system_perf.get('cpu_usage', 0))
-            memory_usages.append(system_perf.get('memory_usage', 0))
+        success_rate_trend = float(task_success_rates[-1] - task_success_rates[0])
         
         return {
             'period_days': days,
-            'data_points': len(recent_data),
+            'data_points': data_points,
             'memory_trends': {
                 'total_growth': memory_growth,
                 'growth_rate': memory_growth / days if days > 0 else 0
@@ -455,10 +679,10 @@ class MemoryAnalytics:
                 'performance_trend': 'improving' if success_rate_trend > 0 else 'declining' if success_rate_trend < 0 else 'stable'
             },
             'system_trends': {
-                'average_cpu': statistics.mean(cpu_usages) if cpu_usages else 0,
-                'average_memory': statistics.mean(memory_usages) if memory_usages else 0,
-                'cpu_trend': 'increasing' if len(cpu_usages) > 1 and cpu_usages[-1] > cpu_usages[0] else 'stable',
-                'memory_trend': 'increasing' if len(memory_usages) > 1 and memory_usages[-1] > memory_usages[0] else 'stable'
+                'average_cpu': float(cpu_usages.mean()),
+                'average_memory': float(memory_usages.mean()),
+                'cpu_trend': 'increasing' if cpu_usages[-1] > cpu_usages[0] else 'stable',
+                'memory_trend': 'increasing' if memory_usages[-1] > memory_usages[0] else 'stable'
             }
         }
 
@@ -7,18 +7,188 @@ Advanced knowledge graph creation and visualization for NeuroForge memory system
 
 import json
 import asyncio
-from typing import Dict, List, Set, Optional, Any, Tuple
-from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Set, Optional, Any, Tuple
+from collections.abc import Mapping
+from dataclasses import dataclass
 from pathlib import Path
 import networkx as nx
-from collections import defaultdict, Counter
+import numpy as np
+from collections import defaultdict
+from itertools import chain, islice
 import hashlib
+import threading
+import re
 import time
 import logging
 
+# RE2 matches in linear time with a DFA; fall back to the backtracking re module
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+try:
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+try:
+    from datasketch import MinHash, MinHashLSH
+    DATASKETCH_AVAILABLE = True
+except ImportError:
+    DATASKETCH_AVAILABLE = False
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from pyroaring import BitMap
+    PYROARING_AVAILABLE = True
+except ImportError:
+    PYROARING_AVAILABLE = False
+
+# Non-cryptographic hashing for content and file ids; md5 when unavailable
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Concept extraction: words of four or more letters, minus common English words.
+# Only the start of very large payloads is scanned, and at most 10 concepts kept.
+_MIN_CONCEPT_LENGTH = 4
+_MAX_CONCEPTS = 10
+_MAX_CONCEPT_TEXT = 16 * 1024
+_WORD_RE = (re2 if RE2_AVAILABLE else re).compile(r'\b[a-z]{4,}\b')
+_STOPWORDS = frozenset({
+    'tell', 'does', 'most', 'over', 'said', 'some', 'time', 'very', 'when', 'much', 'take',
+    'than', 'only', 'think', 'also', 'come', 'that', 'with', 'have', 'this', 'will', 'your',
+    'from', 'they', 'know', 'want', 'been', 'good', 'would', 'there', 'could', 'other',
+    'after', 'first', 'well', 'year', 'work', 'such', 'make', 'even', 'here', 'where',
+    'through', 'down', 'just', 'before', 'never', 'right', 'each', 'keep', 'place', 'still',
+    'small', 'every', 'found', 'those', 'under', 'might', 'while', 'house', 'without',
+    'again', 'great', 'around', 'another', 'came', 'three', 'high', 'upon', 'school',
+    'hand', 'little', 'world', 'often', 'until', 'country', 'both', 'order', 'during',
+    'between', 'become', 'water', 'though', 'which', 'show', 'head', 'began', 'left',
+    'turn', 'asked', 'move', 'last', 'made', 'white', 'next', 'sound', 'once', 'large',
+    'light', 'name', 'play', 'away', 'live', 'home', 'today', 'always', 'point', 'going',
+    'same', 'second', 'night', 'looked', 'help', 'part', 'word', 'long', 'story', 'seem',
+    'line', 'black', 'kind', 'sure', 'done', 'being', 'open', 'group', 'young', 'state',
+    'need', 'public', 'called', 'held', 'life', 'face', 'fact', 'give', 'across', 'walk',
+    'form', 'hard', 'having', 'heard', 'means', 'money', 'along', 'building', 'call',
+    'eyes', 'feel', 'known', 'looking', 'several', 'side', 'social', 'thought', 'used',
+    'using', 'whole', 'within', 'question', 'include', 'major', 'seen', 'something',
+    'together', 'turned', 'since', 'either', 'went', 'against', 'different', 'many',
+    'sometimes', 'started', 'himself', 'family', 'person', 'business', 'possible',
+    'nothing', 'almost', 'course', 'community', 'enough', 'important', 'information',
+    'really', 'someone', 'system', 'things', 'women', 'program', 'process', 'should',
+    'example', 'general', 'government', 'health', 'increase', 'interest', 'national',
+    'number', 'political', 'president', 'problem', 'provide', 'seems', 'service',
+    'students', 'university', 'years'
+})
+
+# Above this many nodes in the largest component, centralities are approximated
+_EXACT_CENTRALITY_LIMIT = 500
+_CENTRALITY_SAMPLES = 100
+
+
+def _slot_set():
+    """Empty set of node slots; a compressed bitmap when pyroaring is available"""
+    return BitMap() if PYROARING_AVAILABLE else set()
+
+
+def _json_default(obj):
+    """Serialize sets for json/orjson; anything else is still an error"""
+    if isinstance(obj, (set, frozenset)) or (PYROARING_AVAILABLE and isinstance(obj, BitMap)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_bytes(obj) -> bytes:
+    """Compact JSON encoding via orjson, or json for what orjson rejects
+    (such as integers beyond 64 bits)"""
+    try:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return json.dumps(obj, default=_json_default).encode()
+
+
+# Similarity kernels over CSR concept ids: row i of (node_ptr, node_concepts)
+# holds node i's sorted concept ids, and row c of (post_ptr, post_nodes) the
+# ascending positions of the nodes containing concept c.
+def _jaccard_sorted(a, b):
+    i = j = inter = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            inter += 1
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return inter / (len(a) + len(b) - inter)
+
+
+def _earlier_candidates(i, node_ptr, node_concepts, post_ptr, post_nodes):
+    total = 0
+    for p in range(node_ptr[i], node_ptr[i + 1]):
+        c = node_concepts[p]
+        total += np.searchsorted(post_nodes[post_ptr[c]:post_ptr[c + 1]], i)
+    found = np.empty(total, dtype=np.int32)
+    k = 0
+    for p in range(node_ptr[i], node_ptr[i + 1]):
+        c = node_concepts[p]
+        postings = post_nodes[post_ptr[c]:post_ptr[c + 1]]
+        n = np.searchsorted(postings, i)
+        found[k:k + n] = postings[:n]
+        k += n
+    return np.unique(found)
+
+
+def _similarity_counts(node_ptr, node_concepts, post_ptr, post_nodes, threshold):
+    n = len(node_ptr) - 1
+    counts = np.zeros(n, dtype=np.int64)
+    for i in prange(n):
+        a = node_concepts[node_ptr[i]:node_ptr[i + 1]]
+        for j in _earlier_candidates(i, node_ptr, node_concepts, post_ptr, post_nodes):
+            if _jaccard_sorted(a, node_concepts[node_ptr[j]:node_ptr[j + 1]]) > threshold:
+                counts[i] += 1
+    return counts
+
+
+def _similarity_fill(node_ptr, node_concepts, post_ptr, post_nodes, threshold, out_ptr, earlier, similarity):
+    for i in prange(len(node_ptr) - 1):
+        a = node_concepts[node_ptr[i]:node_ptr[i + 1]]
+        k = out_ptr[i]
+        for j in _earlier_candidates(i, node_ptr, node_concepts, post_ptr, post_nodes):
+            score = _jaccard_sorted(a, node_concepts[node_ptr[j]:node_ptr[j + 1]])
+            if score > threshold:
+                earlier[k] = j
+                similarity[k] = score
+                k += 1
+
+
+if NUMBA_AVAILABLE:
+    _jaccard_sorted = njit(_jaccard_sorted)
+    _earlier_candidates = njit(_earlier_candidates)
+    _similarity_counts = njit(parallel=True)(_similarity_counts)
+    _similarity_fill = njit(parallel=True)(_similarity_fill)
+
+@dataclass(slots=True)
 class GraphNode:
     """Represents a node in the knowledge graph"""
     id: str
@@ -30,9 +200,18 @@ class GraphNode:
     access_count: int
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        """Flat dict view; ``properties`` is shared with the node, not copied"""
+        return {
+            'id': self.id,
+            'label': self.label,
+            'type': self.type,
+            'properties': self.properties,
+            'created_at': self.created_at,
+            'last_accessed': self.last_accessed,
+            'access_count': self.access_count
+        }
 
-@dataclass
+@dataclass(slots=True)
 class GraphEdge:
     """Represents an edge in the knowledge graph"""
     source: str
@@ -43,24 +222,172 @@ class GraphEdge:
     created_at: float
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        """Flat dict view; ``properties`` is shared with the edge, not copied"""
+        return {
+            'source': self.source,
+            'target': self.target,
+            'relationship': self.relationship,
+            'weight': self.weight,
+            'properties': self.properties,
+            'created_at': self.created_at
+        }
+
+class NodeStore(Mapping):
+    """Columnar node table, read as a ``Mapping[str, GraphNode]``
+    
+    Scalar fields live in parallel NumPy arrays indexed by insertion slot,
+    labels and properties in lists. ``GraphNode`` objects are built on
+    access, so scalar updates go through ``put``/``touch``; ``properties``
+    is shared and may be updated in place.
+    """
+    
+    def __init__(self, capacity: int = 64):
+        self._slots: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._labels: List[str] = []
+        self._properties: List[Dict[str, Any]] = []
+        self._type_names: List[str] = []
+        self._type_ids: Dict[str, int] = {}
+        self._type = np.empty(capacity, dtype=np.int16)
+        self._created_at = np.empty(capacity, dtype=np.float64)
+        self._last_accessed = np.empty(capacity, dtype=np.float64)
+        self._access_count = np.empty(capacity, dtype=np.int64)
+    
+    def _grow(self) -> None:
+        for name in ('_type', '_created_at', '_last_accessed', '_access_count'):
+            column = getattr(self, name)
+            grown = np.empty(len(column) * 2, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+    
+    def put(self, node: GraphNode) -> None:
+        """Insert a node, or overwrite the one with the same id in place"""
+        slot = self._slots.get(node.id)
+        if slot is None:
+            slot = len(self._ids)
+            if slot == len(self._type):
+                self._grow()
+            self._slots[node.id] = slot
+            self._ids.append(node.id)
+            self._labels.append(node.label)
+            self._properties.append(node.properties)
+        else:
+            self._labels[slot] = node.label
+            self._properties[slot] = node.properties
+        
+        type_id = self._type_ids.get(node.type)
+        if type_id is None:
+            type_id = self._type_ids[node.type] = len(self._type_names)
+            self._type_names.append(node.type)
+        
+        self._type[slot] = type_id
+        self._created_at[slot] = node.created_at
+        self._last_accessed[slot] = node.last_accessed
+        self._access_count[slot] = node.access_count
+    
+    def touch(self, node_id: str, timestamp: float) -> None:
+        """Record an access to a node"""
+        slot = self._slots[node_id]
+        self._access_count[slot] += 1
+        self._last_accessed[slot] = timestamp
+    
+    def slot_of(self, node_id: str) -> int:
+        """Stable integer position of a node"""
+        return self._slots[node_id]
+    
+    def label_of(self, node_id: str) -> str:
+        return self._labels[self._slots[node_id]]
+    
+    def type_of(self, node_id: str) -> str:
+        return self._type_names[self._type[self._slots[node_id]]]
+    
+    def properties_of(self, node_id: str) -> Dict[str, Any]:
+        return self._properties[self._slots[node_id]]
+    
+    def ids_of_type(self, node_type: str) -> List[str]:
+        """Ids of all nodes of a type, in insertion order"""
+        type_id = self._type_ids.get(node_type)
+        if type_id is None:
+            return []
+        ids = self._ids
+        return [ids[i] for i in np.flatnonzero(self._type[:len(ids)] == type_id).tolist()]
+    
+    def type_counts(self) -> Dict[str, int]:
+        """Node count per type, types ordered by first appearance"""
+        counts = np.bincount(self._type[:len(self._ids)], minlength=len(self._type_names))
+        return {name: count for name, count in zip(self._type_names, counts.tolist()) if count}
+    
+    def __getitem__(self, node_id: str) -> GraphNode:
+        slot = self._slots[node_id]
+        return GraphNode(
+            id=node_id,
+            label=self._labels[slot],
+            type=self._type_names[self._type[slot]],
+            properties=self._properties[slot],
+            created_at=float(self._created_at[slot]),
+            last_accessed=float(self._last_accessed[slot]),
+            access_count=int(self._access_count[slot])
+        )
+    
+    def __contains__(self, node_id: object) -> bool:
+        return node_id in self._slots
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ids)
+    
+    def __len__(self) -> int:
+        return len(self._ids)
 
 class KnowledgeGraphBuilder:
     """Builds and maintains the knowledge graph from NeuroForge data"""
     
-    def __init__(self, workspace_path: Optional[Path] = None):
+    def __init__(self, workspace_path: Optional[Path] = None, approximate_similarity: bool = False):
         self.workspace_path = workspace_path or Path.cwd()
         self.graph = nx.DiGraph()
-        self.nodes: Dict[str, GraphNode] = {}
-        self.edges: Dict[str, GraphEdge] = {}
+        self.nodes = NodeStore()
+        # Edges keyed by (source slot, target slot, relationship id)
+        self.edges: Dict[Tuple[int, int, int], GraphEdge] = {}
+        self._rel_ids: Dict[str, int] = {}
+        self._rel_counts: List[int] = []
         self.concept_patterns: Dict[str, Set[str]] = defaultdict(set)
         
+        # Inverted index for similarity candidates: concept -> memory node ids
+        self._concept_index: Dict[str, Set[str]] = defaultdict(set)
+        self._node_concepts: Dict[str, frozenset] = {}
+        self._node_order: Dict[str, int] = {}
+        self._workspace_index: Dict[str, Set[str]] = defaultdict(set)
+        self._node_workspace: Dict[str, str] = {}
+        
+        # Optional MinHash LSH for candidate lookup on large graphs; may miss
+        # a few borderline pairs in exchange for near-constant query time
+        self._lsh = None
+        if approximate_similarity and DATASKETCH_AVAILABLE:
+            self._lsh = MinHashLSH(threshold=0.2, num_perm=64)
+        
         # Graph analysis cache
         self._analysis_cache: Dict[str, Any] = {}
         self._cache_timestamp = 0
+        self._dirty = True  # Set by every write; cleared when analysis is recomputed
+        self._num_edges = 0  # Mirrors self.graph.number_of_edges()
+        # Edges staged by _stage_edge, keyed by (source, target), not yet in self.graph
+        self._pending_edges: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    
+    def _store_node(self, node: GraphNode) -> None:
+        """Insert a node into the node table and the graph
+        
+        The graph only holds node ids; attributes live in ``self.nodes``.
+        """
+        self.nodes.put(node)
+        self.graph.add_node(node.id)
+        self._dirty = True
     
-    def add_memory_node(self, memory_id: str, memory_data: Dict[str, Any]) -> str:
-        """Add a memory as a node in the knowledge graph"""
+    def add_memory_node(self, memory_id: str, memory_data: Dict[str, Any],
+                        link_similar: bool = True) -> str:
+        """Add a memory as a node in the knowledge graph
+        
+        Bulk loads can pass ``link_similar=False`` and call
+        ``rebuild_similarity`` once at the end.
+        """
         node_id = f"memory_{memory_id}"
         
         # Extract concepts from memory content
@@ -83,16 +410,18 @@ class KnowledgeGraphBuilder:
             access_count=1
         )
         
-        self.nodes[node_id] = node
-        self.graph.add_node(node_id, **node.to_dict())
+        self._store_node(node)
+        self._index_memory(node_id, concepts, memory_data.get('workspace', ''))
         
         # Add concept nodes and edges
         for concept in concepts:
-            self._add_concept_node(concept)
-            self._add_edge(node_id, f"concept_{concept}", "contains")
+            self._add_concept_node(concept, node_id)
+            self._stage_edge(node_id, f"concept_{concept}", "contains")
+        self._flush_edges()
         
         # Find and create similarity edges
-        self._create_similarity_edges(node_id)
+        if link_similar:
+            self._create_similarity_edges(node_id)
         
         logger.debug(f"Added memory node: {node_id}")
         return node_id
@@ -100,6 +429,7 @@ class KnowledgeGraphBuilder:
     def add_task_node(self, task_id: str, task_data: Dict[str, Any]) -> str:
         """Add a task as a node in the knowledge graph"""
         node_id = f"task_{task_id}"
+        concepts = self._extract_concepts(task_data)
         
         node = GraphNode(
             id=node_id,
@@ -111,25 +441,25 @@ class KnowledgeGraphBuilder:
                 'parameters': task_data.get('parameters', {}),
                 'workspace': task_data.get('workspace', ''),
                 'execution_time': task_data.get('execution_time', 0),
-                'success': task_data.get('status') == 'completed'
+                'success': task_data.get('status') == 'completed',
+                'concepts': list(concepts)
             },
             created_at=task_data.get('created_at', time.time()),
             last_accessed=time.time(),
             access_count=1
         )
         
-        self.nodes[node_id] = node
-        self.graph.add_node(node_id, **node.to_dict())
+        self._store_node(node)
         
         # Connect task to related memories
-        self._connect_task_to_memories(node_id, task_data)
+        self._connect_task_to_memories(node_id, task_data, concepts)
         
         logger.debug(f"Added task node: {node_id}")
         return node_id
     
     def add_file_node(self, file_path: str, file_data: Dict[str, Any]) -> str:
         """Add a file as a node in the knowledge graph"""
-        node_id = f"file_{hashlib.md5(file_path.encode()).hexdigest()[:8]}"
+        node_id = f"file_{self._hash_path(file_path)}"
         
         node = GraphNode(
             id=node_id,
@@ -147,14 +477,17 @@ class KnowledgeGraphBuilder:
             access_count=1
         )
         
-        self.nodes[node_id] = node
-        self.graph.add_node(node_id, **node.to_dict())
+        self._store_node(node)
         
         logger.debug(f"Added file node: {node_id}")
         return node_id
     
-    def _add_concept_node(self, concept: str) -> str:
-        """Add a concept node to the graph"""
+    def _add_concept_node(self, concept: str, memory_id: Optional[str] = None) -> str:
+        """Add a concept node to the graph
+        
+        ``related_memories`` holds the node-store slots of the memories that
+        mention the concept.
+        """
         node_id = f"concept_{concept}"
         
         if node_id not in self.nodes:
@@ -164,29 +497,44 @@ class KnowledgeGraphBuilder:
                 type='concept',
                 properties={
                     'frequency': 1,
-                    'related_memories': set(),
-                    'related_tasks': set()
+                    'related_memories': _slot_set(),
+                    'related_tasks': _slot_set()
                 },
                 created_at=time.time(),
                 last_accessed=time.time(),
                 access_count=1
             )
             
-            self.nodes[node_id] = node
-            self.graph.add_node(node_id, **node.to_dict())
+            self._store_node(node)
         else:
             # Update frequency
-            self.nodes[node_id].properties['frequency'] += 1
-            self.nodes[node_id].access_count += 1
-            self.nodes[node_id].last_accessed = time.time()
+            self.nodes.properties_of(node_id)['frequency'] += 1
+            self.nodes.touch(node_id, time.time())
+            self._dirty = True
+        
+        if memory_id is not None:
+            self.nodes.properties_of(node_id)['related_memories'].add(self.nodes.slot_of(memory_id))
         
         return node_id
     
-    def _add_edge(self, source: str, target: str, relationship: str, weight: float = 1.0, properties: Optional[Dict] = None) -> str:
+    def _add_edge(self, source: str, target: str, relationship: str, weight: float = 1.0,
+                  properties: Optional[Dict] = None) -> Tuple[int, int, int]:
         """Add an edge to the graph"""
-        edge_id = f"{source}_{target}_{relationship}"
+        edge_key = self._stage_edge(source, target, relationship, weight, properties)
+        self._flush_edges()
+        return edge_key
+    
+    def _stage_edge(self, source: str, target: str, relationship: str, weight: float = 1.0,
+                    properties: Optional[Dict] = None) -> Tuple[int, int, int]:
+        """Record an edge; new edges reach ``self.graph`` on ``_flush_edges``"""
+        rel_id = self._rel_ids.get(relationship)
+        if rel_id is None:
+            rel_id = self._rel_ids[relationship] = len(self._rel_counts)
+            self._rel_counts.append(0)
+        edge_key = (self.nodes.slot_of(source), self.nodes.slot_of(target), rel_id)
         
-        if edge_id not in self.edges:
+        edge = self.edges.get(edge_key)
+        if edge is None:
             edge = GraphEdge(
                 source=source,
                 target=target,
@@ -196,96 +544,270 @@ class KnowledgeGraphBuilder:
                 created_at=time.time()
             )
             
-            self.edges[edge_id] = edge
-            self.graph.add_edge(source, target, **edge.to_dict())
+            self.edges[edge_key] = edge
+            self._rel_counts[rel_id] += 1
+            pair = (source, target)
+            if pair not in self._pending_edges and not self.graph.has_edge(source, target):
+                self._num_edges += 1
+            self._pending_edges[pair] = edge.to_dict()
         else:
             # Strengthen existing edge
-            self.edges[edge_id].weight += weight * 0.1
-            self.graph[source][target]['weight'] = self.edges[edge_id].weight
+            edge.weight += weight * 0.1
+            attrs = self._pending_edges.get((source, target))
+            if attrs is None:
+                attrs = self.graph[source][target]
+            attrs['weight'] = edge.weight
         
-        return edge_id
+        self._dirty = True
+        return edge_key
+    
+    def _flush_edges(self) -> None:
+        """Add the staged edges to ``self.graph`` in one call"""
+        if self._pending_edges:
+            self.graph.add_edges_from((source, target, attrs)
+                                      for (source, target), attrs in self._pending_edges.items())
+            self._pending_edges.clear()
     
     def _extract_concepts(self, data: Dict[str, Any]) -> Set[str]:
         """Extract concepts from data using simple keyword extraction"""
         text = ' '.join(str(v) for v in data.values() if isinstance(v, (str, int, float)))
-        text = text.lower()
-        
-        # Simple concept extraction (in practice, this would be more sophisticated)
-        import re
-        words = re.findall(r'\b[a-z]{3,}\b', text)
-        
-        # Filter out common words
-        stopwords = {'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'its', 'may', 'new', 'now', 'old', 'see', 'two', 'who', 'boy', 'did', 'man', 'way', 'she', 'use', 'top', 'put', 'end', 'why', 'let', 'say', 'too', 'any', 'may', 'own', 'set', 'tell', 'does', 'most', 'over', 'said', 'some', 'time', 'very', 'when', 'much', 'take', 'than', 'only', 'think', 'also', 'come', 'that', 'with', 'have', 'this', 'will', 'your', 'from', 'they', 'know', 'want', 'been', 'good', 'much', 'some', 'would', 'there', 'could', 'other', 'after', 'first', 'well', 'year', 'work', 'such', 'make', 'even', 'here', 'where', 'through', 'when', 'down', 'just', 'before', 'never', 'now', 'right', 'each', 'keep', 'place', 'still', 'small', 'every', 'found', 'those', 'never', 'under', 'might', 'while', 'house', 'without', 'again', 'great', 'around', 'another', 'came', 'three', 'high', 'upon', 'school', 'still', 'hand', 'little', 'world', 'often', 'until', 'country', 'never', 'both', 'order', 'during', 'between', 'become', 'water', 'another', 'right', 'though', 'each', 'which', 'show', 'head', 'began', 'left', 'turn', 'asked', 'move', 'while', 'last', 'made', 'white', 'next', 'sound', 'once', 'large', 'light', 'name', 'play', 'away', 'live', 'home', 'today', 'place', 'always', 'point', 'going', 'same', 'second', 'night', 'looked', 'help', 'old', 'part', 'word', 'long', 'story', 'help', 'seem', 'line', 'black', 'kind', 'came', 'sure', 'done', 'being', 'open', 'group', 'young', 'got', 'state', 'need', 'public', 'called', 'held', 'life', 'face', 'fact', 'give', 'across', 'walk', 'form', 'hard', 'having', 'heard', 'means', 'money', 'along', 'began', 'building', 'call', 'eyes', 'feel', 'known', 'looking', 'several', 'side', 'social', 'thought', 'used', 'using', 'whole', 'within', 'question', 'include', 'major', 'often', 'seen', 'something', 'together', 'turned', 'water', 'since', 'either', 'until', 'went', 'without', 'against', 'came', 'different', 'many', 'sometimes', 'started', 'himself', 'family', 'person', 'business', 'possible', 'nothing', 'almost', 'course', 'community', 'enough', 'himself', 'important', 'information', 'looking', 'really', 'someone', 'system', 'things', 'women', 'always', 'program', 'process', 'right', 'should', 'small', 'example', 'general', 'government', 'group', 'hand', 'health', 'high', 'important', 'increase', 'interest', 'large', 'national', 'number', 'often', 'place', 'point', 'political', 'possible', 'president', 'problem', 'provide', 'public', 'really', 'right', 'seems', 'service', 'should', 'small', 'social', 'something', 'state', 'students', 'system', 'though', 'three', 'through', 'today', 'together', 'university', 'water', 'white', 'without', 'women', 'world', 'years', 'young'}
+        text = text[:_MAX_CONCEPT_TEXT].lower()
+        if len(text) < _MIN_CONCEPT_LENGTH:
+            return set()
         
+        # Simple concept extraction (in practice, this would be more sophisticated);
+        # stop at the first 10 distinct concepts
         concepts = set()
-        for word in words:
-            if len(word) >= 4 and word not in stopwords:
+        for match in _WORD_RE.finditer(text):
+            word = match.group()
+            if word not in _STOPWORDS:
                 concepts.add(word)
+                if len(concepts) == _MAX_CONCEPTS:
+                    break
         
-        # Limit to most relevant concepts
-        return set(list(concepts)[:10])  # Top 10 concepts
+        return concepts
     
     def _hash_content(self, data: Dict[str, Any]) -> str:
         """Create a hash of the content for similarity comparison"""
-        content_str = json.dumps(data, sort_keys=True)
-        return hashlib.md5(content_str.encode()).hexdigest()
+        # orjson produces the canonical (sorted-key) encoding directly as bytes
+        content = None
+        if ORJSON_AVAILABLE:
+            try:
+                content = orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                pass  # e.g. integers beyond 64 bits, which json handles
+        if content is None:
+            content = json.dumps(data, sort_keys=True).encode()
+        
+        if XXHASH_AVAILABLE:
+            return xxhash.xxh3_128_hexdigest(content)
+        return hashlib.md5(content).hexdigest()
+    
+    def _hash_path(self, file_path: str) -> str:
+        """Short (8 hex digit) hash of a file path, used in file node ids"""
+        if XXHASH_AVAILABLE:
+            return f"{xxhash.xxh3_64_intdigest(file_path.encode()) & 0xFFFFFFFF:08x}"
+        return hashlib.md5(file_path.encode()).hexdigest()[:8]
+    
+    def _index_memory(self, node_id: str, concepts: Set[str], workspace: str) -> None:
+        """Record a memory node's concepts and workspace in the inverted indexes"""
+        slot = self.nodes.slot_of(node_id)
+        for concept in self._node_concepts.get(node_id, ()):
+            self._concept_index[concept].discard(node_id)
+            self.nodes.properties_of(f"concept_{concept}")['related_memories'].discard(slot)
+        if node_id in self._node_workspace:
+            self._workspace_index[self._node_workspace[node_id]].discard(node_id)
+        
+        self._node_concepts[node_id] = frozenset(concepts)
+        self._node_order.setdefault(node_id, len(self._node_order))
+        for concept in concepts:
+            self._concept_index[concept].add(node_id)
+        
+        self._node_workspace[node_id] = workspace
+        self._workspace_index[workspace].add(node_id)
+    
+    def _similarity_candidates(self, node_id: str, concepts: frozenset) -> Set[str]:
+        """Memory nodes that may be similar to ``node_id``
+        
+        Exactly the nodes sharing a concept, or the LSH buckets' members when
+        approximate similarity is enabled and there are enough concepts to
+        make a useful signature.
+        """
+        if self._lsh is None or len(concepts) < 2:
+            return set().union(*(self._concept_index[c] for c in concepts))
+        
+        signature = MinHash(num_perm=64)
+        for concept in concepts:
+            signature.update(concept.encode())
+        
+        candidates = set(self._lsh.query(signature))
+        if node_id in self._lsh:
+            self._lsh.remove(node_id)
+        self._lsh.insert(node_id, signature)
+        return candidates
     
     def _create_similarity_edges(self, node_id: str):
         """Create similarity edges between nodes"""
-        current_node = self.nodes[node_id]
-        current_concepts = set(current_node.properties.get('concepts', []))
+        current_type = self.nodes.type_of(node_id)
+        current_concepts = self._node_concepts.get(node_id, frozenset())
+        if not current_concepts:
+            return
+        
+        # Visit candidates in insertion order to keep edge order stable
+        candidates = self._similarity_candidates(node_id, current_concepts)
+        candidates.discard(node_id)
         
-        for other_id, other_node in self.nodes.items():
-            if other_id == node_id or other_node.type != current_node.type:
+        for other_id in sorted(candidates, key=self._node_order.__getitem__):
+            if self.nodes.type_of(other_id) != current_type:
                 continue
             
-            other_concepts = set(other_node.properties.get('concepts', []))
-            
             # Calculate Jaccard similarity
-            if current_concepts and other_concepts:
-                intersection = len(current_concepts & other_concepts)
-                union = len(current_concepts | other_concepts)
-                similarity = intersection / union if union > 0 else 0
-                
-                # Create edge if similarity is significant
-                if similarity > 0.2:  # Threshold for similarity
-                    self._add_edge(
-                        node_id, other_id, "similar_to", 
-                        weight=similarity,
-                        properties={'similarity_score': similarity}
-                    )
+            other_concepts = self._node_concepts[other_id]
+            intersection = len(current_concepts & other_concepts)
+            union = len(current_concepts) + len(other_concepts) - intersection
+            similarity = intersection / union
+            
+            # Create edge if similarity is significant
+            if similarity > 0.2:  # Threshold for similarity
+                self._stage_edge(
+                    node_id, other_id, "similar_to", 
+                    weight=similarity,
+                    properties={'similarity_score': similarity}
+                )
+        self._flush_edges()
     
-    def _connect_task_to_memories(self, task_id: str, task_data: Dict[str, Any]):
+    def rebuild_similarity(self, threshold: float = 0.2) -> int:
+        """Recompute every memory similarity edge in one batch
+        
+        Each memory links to the earlier memories it is similar to, as if
+        the memories had been added one by one. Returns the edge count.
+        """
+        similar_id = self._rel_ids.get('similar_to')
+        for edge_key in [key for key in self.edges if key[2] == similar_id]:
+            edge = self.edges.pop(edge_key)
+            if self.graph.has_edge(edge.source, edge.target):
+                self.graph.remove_edge(edge.source, edge.target)
+                self._num_edges -= 1
+                self._dirty = True
+        if similar_id is not None:
+            self._rel_counts[similar_id] = 0
+        
+        node_ids = [nid for nid, concepts in self._node_concepts.items() if concepts]
+        # The compiled kernels skip the full pairwise overlap product
+        if NUMBA_AVAILABLE:
+            pairs = self._similarity_pairs_jit(node_ids, threshold)
+        elif SCIPY_AVAILABLE:
+            pairs = self._similarity_pairs_sparse(node_ids, threshold)
+        else:
+            pairs = self._similarity_pairs_indexed(node_ids, threshold)
+        
+        for later, earlier, similarity in pairs:
+            self._stage_edge(
+                node_ids[later], node_ids[earlier], "similar_to",
+                weight=similarity,
+                properties={'similarity_score': similarity}
+            )
+        self._flush_edges()
+        return len(pairs)
+    
+    def _similarity_pairs_jit(self, node_ids: List[str], threshold: float) -> List[Tuple[int, int, float]]:
+        """(later, earlier, jaccard) index triples from the compiled kernels"""
+        vocabulary: Dict[str, int] = {}
+        rows = [sorted(vocabulary.setdefault(c, len(vocabulary)) for c in self._node_concepts[nid])
+                for nid in node_ids]
+        sizes = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+        node_ptr = np.concatenate(([0], np.cumsum(sizes)))
+        node_concepts = np.fromiter(chain.from_iterable(rows), dtype=np.int32, count=int(node_ptr[-1]))
+        
+        # Concept -> node postings; a stable sort keeps node positions ascending
+        owners = np.repeat(np.arange(len(rows), dtype=np.int32), sizes)
+        order = np.argsort(node_concepts, kind='stable')
+        post_nodes = owners[order]
+        post_ptr = np.concatenate(([0], np.cumsum(np.bincount(node_concepts, minlength=len(vocabulary)))))
+        
+        counts = _similarity_counts(node_ptr, node_concepts, post_ptr, post_nodes, threshold)
+        out_ptr = np.concatenate(([0], np.cumsum(counts)))
+        earlier = np.empty(out_ptr[-1], dtype=np.int32)
+        similarity = np.empty(out_ptr[-1], dtype=np.float64)
+        _similarity_fill(node_ptr, node_concepts, post_ptr, post_nodes, threshold, out_ptr, earlier, similarity)
+        
+        later = np.repeat(np.arange(len(rows)), counts)
+        return list(zip(later.tolist(), earlier.tolist(), similarity.tolist()))
+    
+    def _similarity_pairs_sparse(self, node_ids: List[str], threshold: float) -> List[Tuple[int, int, float]]:
+        """(later, earlier, jaccard) index triples from a concept incidence matrix"""
+        vocabulary: Dict[str, int] = {}
+        indices = [vocabulary.setdefault(concept, len(vocabulary))
+                   for nid in node_ids for concept in self._node_concepts[nid]]
+        sizes = np.fromiter((len(self._node_concepts[nid]) for nid in node_ids),
+                            dtype=np.int64, count=len(node_ids))
+        indptr = np.concatenate(([0], np.cumsum(sizes)))
+        incidence = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), indices, indptr),
+            shape=(len(node_ids), len(vocabulary))
+        )
+        
+        # Intersections for every pair at once; the lower triangle pairs each
+        # memory with the earlier ones
+        overlap = sparse.tril(incidence @ incidence.T, k=-1).tocoo()
+        jaccard = overlap.data / (sizes[overlap.row] + sizes[overlap.col] - overlap.data)
+        keep = np.flatnonzero(jaccard > threshold)
+        keep = keep[np.lexsort((overlap.col[keep], overlap.row[keep]))]
+        return list(zip(overlap.row[keep].tolist(), overlap.col[keep].tolist(), jaccard[keep].tolist()))
+    
+    def _similarity_pairs_indexed(self, node_ids: List[str], threshold: float) -> List[Tuple[int, int, float]]:
+        """(later, earlier, jaccard) index triples via the inverted concept index"""
+        position = {nid: i for i, nid in enumerate(node_ids)}
+        pairs = []
+        for later, nid in enumerate(node_ids):
+            concepts = self._node_concepts[nid]
+            candidates = set().union(*(self._concept_index[c] for c in concepts))
+            for earlier in sorted(position[c] for c in candidates if position.get(c, later) < later):
+                other = self._node_concepts[node_ids[earlier]]
+                intersection = len(concepts & other)
+                similarity = intersection / (len(concepts) + len(other) - intersection)
+                if similarity > threshold:
+                    pairs.append((later, earlier, similarity))
+        return pairs
+    
+    def _connect_task_to_memories(self, task_id: str, task_data: Dict[str, Any],
+                                  task_concepts: Optional[Set[str]] = None):
         """Connect task nodes to related memory nodes"""
         task_workspace = task_data.get('workspace', '')
-        task_concepts = self._extract_concepts(task_data)
-        
-        for node_id, node in self.nodes.items():
-            if node.type == 'memory':
-                memory_workspace = node.properties.get('workspace', '')
-                memory_concepts = set(node.properties.get('concepts', []))
-                
-                # Connect if same workspace
-                if task_workspace and task_workspace == memory_workspace:
-                    self._add_edge(task_id, node_id, "workspace_related", weight=0.5)
-                
-                # Connect if shared concepts
-                shared_concepts = task_concepts & memory_concepts
-                if shared_concepts:
-                    concept_similarity = len(shared_concepts) / max(len(task_concepts), len(memory_concepts))
-                    if concept_similarity > 0.3:
-                        self._add_edge(
-                            task_id, node_id, "concept_related",
-                            weight=concept_similarity,
-                            properties={'shared_concepts': list(shared_concepts)}
-                        )
+        if task_concepts is None:
+            task_concepts = self._extract_concepts(task_data)
+        
+        # Only memories in the same workspace or sharing a concept can connect;
+        # visit them in insertion order to keep edge order stable
+        candidates = set().union(*(self._concept_index[c] for c in task_concepts))
+        if task_workspace:
+            candidates |= self._workspace_index.get(task_workspace, set())
+        
+        for node_id in sorted(candidates, key=self._node_order.__getitem__):
+            memory_concepts = self._node_concepts[node_id]
+            
+            # Connect if same workspace
+            if task_workspace and task_workspace == self._node_workspace[node_id]:
+                self._stage_edge(task_id, node_id, "workspace_related", weight=0.5)
+            
+            # Connect if shared concepts
+            shared_concepts = task_concepts & memory_concepts
+            if shared_concepts:
+                concept_similarity = len(shared_concepts) / max(len(task_concepts), len(memory_concepts))
+                if concept_similarity > 0.3:
+                    self._stage_edge(
+                        task_id, node_id, "concept_related",
+                        weight=concept_similarity,
+                        properties={'shared_concepts': list(shared_concepts)}
+                    )
+        self._flush_edges()
     
     def analyze_graph(self) -> Dict[str, Any]:
         """Perform comprehensive graph analysis"""
         current_time = time.time()
         
-        # Use cache if recent
-        if self._cache_timestamp > current_time - 60:  # 1 minute cache
+        # Nothing changed since the last analysis, or it is recent enough
+        if self._analysis_cache and (not self._dirty or self._cache_timestamp > current_time - 60):
             return self._analysis_cache
         
         if not self.graph.nodes():
@@ -293,11 +815,11 @@ class KnowledgeGraphBuilder:
         
         # Basic graph metrics
         num_nodes = self.graph.number_of_nodes()
-        num_edges = self.graph.number_of_edges()
+        num_edges = self._num_edges
         density = nx.density(self.graph)
         
         # Node type distribution
-        node_types = Counter(node.type for node in self.nodes.values())
+        node_types = self.nodes.type_counts()
         
         # Centrality measures (for connected components)
         components = list(nx.weakly_connected_components(self.graph))
@@ -308,12 +830,21 @@ class KnowledgeGraphBuilder:
         if len(largest_component) > 1:
             subgraph = self.graph.subgraph(largest_component)
             try:
-                centralities = {
-                    'betweenness': dict(nx.betweenness_centrality(subgraph)),
-                    'closeness': dict(nx.closeness_centrality(subgraph)),
-                    'degree': dict(nx.degree_centrality(subgraph)),
-                    'pagerank': dict(nx.pagerank(subgraph))
-                }
+                if len(subgraph) <= _EXACT_CENTRALITY_LIMIT:
+                    centralities = {
+                        'betweenness': dict(nx.betweenness_centrality(subgraph)),
+                        'closeness': dict(nx.closeness_centrality(subgraph)),
+                        'degree': dict(nx.degree_centrality(subgraph)),
+                        'pagerank': dict(nx.pagerank(subgraph))
+                    }
+                else:
+                    # Sampled betweenness, looser PageRank tolerance and no
+                    # closeness (O(N^2)); only the PageRank top 5 is reported
+                    centralities = {
+                        'betweenness': dict(nx.betweenness_centrality(subgraph, k=_CENTRALITY_SAMPLES, seed=0)),
+                        'degree': dict(nx.degree_centrality(subgraph)),
+                        'pagerank': dict(nx.pagerank(subgraph, tol=1e-4))
+                    }
             except:
                 centralities = {}
         
@@ -325,23 +856,26 @@ class KnowledgeGraphBuilder:
             influential_nodes = [
                 {
                     'id': node_id,
-                    'label': self.nodes[node_id].label,
-                    'type': self.nodes[node_id].type,
+                    'label': self.nodes.label_of(node_id),
+                    'type': self.nodes.type_of(node_id),
                     'score': score
                 }
                 for node_id, score in top_nodes if node_id in self.nodes
             ]
         
         # Concept analysis
-        concept_nodes = [node for node in self.nodes.values() if node.type == 'concept']
-        top_concepts = sorted(
-            concept_nodes,
-            key=lambda x: x.properties.get('frequency', 0),
+        properties_of = self.nodes.properties_of
+        top_concepts = [self.nodes[node_id] for node_id in sorted(
+            self.nodes.ids_of_type('concept'),
+            key=lambda x: properties_of(x).get('frequency', 0),
             reverse=True
-        )[:10]
+        )[:10]]
         
         # Relationship analysis
-        relationship_types = Counter(edge.relationship for edge in self.edges.values())
+        relationship_types = {
+            relationship: self._rel_counts[rel_id]
+            for relationship, rel_id in self._rel_ids.items() if self._rel_counts[rel_id]
+        }
         
         analysis = {
             'graph_metrics': {
@@ -351,8 +885,8 @@ class KnowledgeGraphBuilder:
                 'components': len(components),
                 'largest_component_size': len(largest_component)
             },
-            'node_distribution': dict(node_types),
-            'relationship_distribution': dict(relationship_types),
+            'node_distribution': node_types,
+            'relationship_distribution': relationship_types,
             'influential_nodes': influential_nodes,
             'top_concepts': [
                 {
@@ -368,6 +902,7 @@ class KnowledgeGraphBuilder:
         # Cache the analysis
         self._analysis_cache = analysis
         self._cache_timestamp = current_time
+        self._dirty = False
         
         return analysis
     
@@ -377,11 +912,10 @@ class KnowledgeGraphBuilder:
             return []
         
         try:
-            # Find all simple paths up to max_length
-            paths = list(nx.all_simple_paths(
+            # Stop the path generator after the first 10 paths
+            return list(islice(nx.all_simple_paths(
                 self.graph, source_id, target_id, cutoff=max_length
-            ))
-            return paths[:10]  # Limit to 10 paths
+            ), 10))
         except nx.NetworkXNoPath:
             return []
     
@@ -390,17 +924,9 @@ class KnowledgeGraphBuilder:
         if node_id not in self.graph:
             return {}
         
-        # Get all nodes within depth
-        neighbors = set([node_id])
-        current_level = set([node_id])
-        
-        for _ in range(depth):
-            next_level = set()
-            for node in current_level:
-                next_level.update(self.graph.successors(node))
-                next_level.update(self.graph.predecessors(node))
-            current_level = next_level - neighbors
-            neighbors.update(current_level)
+        # Get all nodes within depth, following edges in either direction
+        undirected = self.graph.to_undirected(as_view=True)
+        neighbors = set(nx.single_source_shortest_path_length(undirected, node_id, cutoff=depth))
         
         # Extract subgraph
         subgraph = self.graph.subgraph(neighbors)
@@ -419,6 +945,32 @@ class KnowledgeGraphBuilder:
             ]
         }
     
+    def _attributed_graph(self) -> nx.DiGraph:
+        """Copy of the graph with node attributes filled in from the node table"""
+        graph = self.graph.copy()
+        nx.set_node_attributes(graph, {node_id: node.to_dict() for node_id, node in self.nodes.items()})
+        return graph
+    
+    def _write_json_stream(self, f) -> None:
+        """Write the graph as a JSON document record by record with orjson"""
+        f.write(b'{"nodes":[')
+        for i, node in enumerate(self.nodes.values()):
+            if i:
+                f.write(b',')
+            f.write(_json_bytes(node.to_dict()))
+        
+        f.write(b'],"edges":[')
+        for i, edge in enumerate(self.edges.values()):
+            if i:
+                f.write(b',')
+            f.write(_json_bytes(edge.to_dict()))
+        
+        f.write(b'],"analysis":')
+        f.write(_json_bytes(self.analyze_graph()))
+        f.write(b',"export_timestamp":')
+        f.write(orjson.dumps(time.time()))
+        f.write(b'}')
+    
     def export_graph(self, format: str = 'json', file_path: Optional[Path] = None) -> Path:
         """Export the knowledge graph in various formats"""
         if file_path is None:
@@ -427,46 +979,42 @@ class KnowledgeGraphBuilder:
         file_path.parent.mkdir(parents=True, exist_ok=True)
         
         if format == 'json':
-            # Convert sets to lists for JSON serialization
-            def convert_sets_to_lists(obj):
-                if isinstance(obj, dict):
-                    return {k: convert_sets_to_lists(v) for k, v in obj.items()}
-                elif isinstance(obj, list):
-                    return [convert_sets_to_lists(item) for item in obj]
-                elif isinstance(obj, set):
-                    return list(obj)
-                else:
-                    return obj
-            
-            graph_data = {
-                'nodes': [convert_sets_to_lists(node.to_dict()) for node in self.nodes.values()],
-                'edges': [convert_sets_to_lists(edge.to_dict()) for edge in self.edges.values()],
-                'analysis': convert_sets_to_lists(self.analyze_graph()),
-                'export_timestamp': time.time()
-            }
-            
-            with open(file_path, 'w') as f:
-                json.dump(graph_data, f, indent=2)
+            if ORJSON_AVAILABLE:
+                # Stream one record at a time instead of building the whole document
+                with open(file_path, 'wb') as f:
+                    self._write_json_stream(f)
+            else:
+                graph_data = {
+                    'nodes': [node.to_dict() for node in self.nodes.values()],
+                    'edges': [edge.to_dict() for edge in self.edges.values()],
+                    'analysis': self.analyze_graph(),
+                    'export_timestamp': time.time()
+                }
+                with open(file_path, 'w') as f:
+                    json.dump(graph_data, f, indent=2, default=_json_default)
         
         elif format == 'gexf':
             # Export as GEXF for Gephi visualization
-            nx.write_gexf(self.graph, file_path)
+            nx.write_gexf(self._attributed_graph(), file_path)
         
         elif format == 'graphml':
             # Export as GraphML for other tools
-            nx.write_graphml(self.graph, file_path)
+            nx.write_graphml(self._attributed_graph(), file_path)
         
         logger.info(f"Knowledge graph exported to {file_path}")
         return file_path
 
 # Global knowledge graph instance
 _global_graph: Optional[KnowledgeGraphBuilder] = None
+_global_graph_lock = threading.Lock()
 
 def get_knowledge_graph() -> KnowledgeGraphBuilder:
     """Get the global knowledge graph instance"""
     global _global_graph
     if _global_graph is None:
-        _global_graph = KnowledgeGraphBuilder()
+        with _global_graph_lock:
+            if _global_graph is None:
+                _global_graph = KnowledgeGraphBuilder()
     return _global_graph
 
 # Example usage and testing
@@ -8,32 +8,127 @@ enabling AI-powered code analysis, generation, and automation.
 """
 
 import asyncio
+import gzip
+import hashlib
 import json
+import os
+import sqlite3
+import sys
+import threading
 import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, replace
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union, AsyncGenerator
+from typing import Deque, Dict, List, Optional, Any, Type, Union, AsyncGenerator
 import logging
 
+# The provider SDKs (openai, anthropic) are imported when their provider is
+# constructed, so mock-only use does not pay for them
+
+try:
+    import aiohttp  # noqa: F401  (backs the SDKs' DefaultAioHttpClient)
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 try:
-    import openai
-    OPENAI_AVAILABLE = True
+    import uvloop
+    UVLOOP_AVAILABLE = True
 except ImportError:
-    OPENAI_AVAILABLE = False
+    UVLOOP_AVAILABLE = False
 
 try:
-    import anthropic
-    ANTHROPIC_AVAILABLE = True
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
 except ImportError:
-    ANTHROPIC_AVAILABLE = False
+    TIKTOKEN_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def run(main):
+    """Run a coroutine to completion on uvloop when available, else asyncio"""
+    if UVLOOP_AVAILABLE:
+        return uvloop.run(main)
+    return asyncio.run(main)
+
+
+# Request bodies at least this large are gzipped when compression is enabled
+_GZIP_MIN_BYTES = 1024
+
+
+async def _gzip_request_body(request) -> None:
+    """HTTP client request hook: gzip large in-memory bodies"""
+    # Streamed bodies are sent as they are
+    if "Content-Encoding" in request.headers or not isinstance(request.stream, httpx.ByteStream):
+        return
+    body = await request.aread()
+    if len(body) < _GZIP_MIN_BYTES:
+        return
+    
+    headers = request.headers.copy()
+    headers["Content-Encoding"] = "gzip"
+    del headers["Content-Length"]  # Recomputed for the compressed body
+    # Hooks cannot replace the request, so take over the new one's body
+    gzipped = httpx.Request(request.method, request.url, headers=headers,
+                            content=gzip.compress(body))
+    request.headers = gzipped.headers
+    request.stream = gzipped.stream
+
+
+def _http_client(sdk, timeout: float, compress: bool = False) -> Optional[Any]:
+    """Pooled HTTP client for an SDK module, or None for its default
+    
+    Prefers the SDK's aiohttp transport; otherwise an httpx client whose
+    keep-alive pool is larger and longer-lived than the SDK default. With
+    ``compress``, large request bodies are sent gzip-encoded.
+    """
+    options = {"event_hooks": {"request": [_gzip_request_body]}} if compress else {}
+    
+    if AIOHTTP_AVAILABLE and hasattr(sdk, 'DefaultAioHttpClient'):
+        try:
+            return sdk.DefaultAioHttpClient(**options)
+        except RuntimeError:  # SDK installed without its aiohttp extra
+            pass
+    
+    if HTTPX_AVAILABLE and hasattr(sdk, 'DefaultAsyncHttpxClient'):
+        return sdk.DefaultAsyncHttpxClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100,
+                                keepalive_expiry=60.0),
+            timeout=timeout,
+            **options
+        )
+    return None
+
+
 class LLMProvider(Enum):
     """Available LLM providers"""
     OPENAI = "openai"
@@ -54,6 +149,86 @@ class LLMCapability(Enum):
     SECURITY = "security"
 
 
+# Capability system prompts, built once and shared by the providers
+_SYSTEM_PROMPTS: Dict[LLMCapability, str] = {
+    LLMCapability.CODE_ANALYSIS: """You are an expert code analyst. Analyze the provided code for:
+- Structure and design patterns
+- Potential bugs and issues
+- Performance optimizations
+- Best practices compliance
+- Security vulnerabilities
+Provide detailed, actionable insights.""",
+    
+    LLMCapability.CODE_GENERATION: """You are an expert software developer. Generate high-quality code that:
+- Follows best practices and conventions
+- Is well-documented and readable
+- Includes error handling
+- Is performant and efficient
+- Follows the specified requirements exactly""",
+    
+    LLMCapability.CODE_REFACTORING: """You are an expert code refactoring specialist. When refactoring code:
+- Maintain existing functionality
+- Improve readability and maintainability
+- Optimize performance where possible
+- Follow modern best practices
+- Provide clear explanations of changes""",
+    
+    LLMCapability.DOCUMENTATION: """You are a technical documentation expert. Create comprehensive documentation that:
+- Is clear and easy to understand
+- Includes examples and use cases
+- Follows standard documentation formats
+- Is accurate and up-to-date
+- Helps developers understand and use the code""",
+    
+    LLMCapability.DEBUGGING: """You are an expert debugger. Help identify and fix issues by:
+- Analyzing error messages and stack traces
+- Identifying root causes
+- Suggesting specific fixes
+- Providing debugging strategies
+- Explaining the underlying problems""",
+    
+    LLMCapability.TESTING: """You are a testing expert. Create comprehensive tests that:
+- Cover all functionality and edge cases
+- Follow testing best practices
+- Are maintainable and readable
+- Include both unit and integration tests
+- Help ensure code quality and reliability""",
+    
+    LLMCapability.ARCHITECTURE: """You are a software architecture expert. Provide architectural guidance that:
+- Considers scalability and maintainability
+- Follows established patterns and principles
+- Balances complexity and simplicity
+- Addresses non-functional requirements
+- Provides clear design decisions""",
+    
+    LLMCapability.SECURITY: """You are a security expert. Analyze code for security issues including:
+- Input validation and sanitization
+- Authentication and authorization
+- Data encryption and protection
+- Common vulnerabilities (OWASP Top 10)
+- Security best practices"""
+}
+_SYSTEM_PROMPTS = {capability: sys.intern(prompt) for capability, prompt in _SYSTEM_PROMPTS.items()}
+_DEFAULT_SYSTEM_PROMPT = "You are a helpful AI assistant for software development."
+
+# Context windows (tokens) by model name prefix; the longest matching prefix wins
+_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4.1": 1047576,
+    "o1": 200000,
+    "o3": 200000,
+    "claude": 200000,
+}
+_DEFAULT_CONTEXT_WINDOW = 8192
+_CHARS_PER_TOKEN = 4  # Estimate when no tokenizer is available
+_PROMPT_OVERHEAD_TOKENS = 64  # Message framing and the prompt section headers
+_OFFLOAD_PROMPT_CHARS = 32 * 1024  # Larger prompts are built off the event loop
+
+
 @dataclass
 class LLMConfig:
     """Configuration for LLM integration"""
@@ -66,10 +241,16 @@ class LLMConfig:
     timeout: int = 30
     rate_limit: int = 10  # requests per minute
     capabilities: List[LLMCapability] = None
+    context_window: Optional[int] = None  # tokens; looked up from the model name if unset
+    compress_requests: bool = False  # gzip large request bodies (endpoint must accept it)
     
     def __post_init__(self):
         if self.capabilities is None:
             self.capabilities = list(LLMCapability)
+        if self.context_window is None:
+            prefixes = [prefix for prefix in _CONTEXT_WINDOWS if self.model.startswith(prefix)]
+            self.context_window = (_CONTEXT_WINDOWS[max(prefixes, key=len)] if prefixes
+                                   else _DEFAULT_CONTEXT_WINDOW)
 
 
 @dataclass
@@ -103,36 +284,140 @@ class LLMResponse:
             self.metadata = {}
 
 
+
+@dataclass(slots=True)
+class RequestLogEntry:
+    """One served request in LLMEngine.request_history"""
+    timestamp: float
+    provider: str
+    capability: str
+    prompt_length: int
+    response_length: int
+    tokens_used: int
+    response_time: float
+    confidence: float
+
+
+@dataclass(slots=True)
+class _InflightCall:
+    """A provider call shared by identical concurrent requests"""
+    task: asyncio.Task
+    waiters: int = 0
+
 class LLMProvider_Interface(ABC):
     """Abstract base class for LLM providers"""
     
+    # Whether identical requests always produce identical responses
+    deterministic = False
+    
     def __init__(self, config: LLMConfig):
         self.config = config
-        self.request_count = 0
-        self.last_request_time = 0
+        
+        # Token bucket: holds up to rate_limit tokens, refilled at rate_limit per minute
+        self._tokens = float(config.rate_limit)
+        self._last_refill = time.monotonic()
+        self._rate_lock = asyncio.Lock()
     
     @abstractmethod
     async def generate_response(self, request: LLMRequest) -> LLMResponse:
         """Generate response from LLM"""
         pass
     
-    async def check_rate_limit(self) -> bool:
-        """Check if we're within rate limits"""
-        current_time = time.time()
-        if current_time - self.last_request_time < 60:  # Within last minute
-            if self.request_count >= self.config.rate_limit:
-                return False
-        else:
-            self.request_count = 0  # Reset counter after a minute
-        return True
-    
-    def update_request_counter(self):
-        """Update request tracking"""
-        current_time = time.time()
-        if current_time - self.last_request_time >= 60:
-            self.request_count = 0
-        self.request_count += 1
-        self.last_request_time = current_time
+    async def stream_response(self, request: LLMRequest) -> AsyncGenerator[str, None]:
+        """Yield the response text as it is generated
+        
+        Providers without streaming support yield the full response at once.
+        """
+        response = await self.generate_response(request)
+        yield response.content
+    
+    async def acquire(self) -> None:
+        """Wait until the rate limit allows another request, then take its token"""
+        rate = self.config.rate_limit / 60  # tokens per second
+        async with self._rate_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.config.rate_limit,
+                                   self._tokens + (now - self._last_refill) * rate)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / rate)
+    
+    def _build_user_prompt(self, request: LLMRequest) -> str:
+        """Build user prompt with context
+        
+        Code context that would overflow the model's context window is cut
+        from the middle, keeping its head and tail.
+        """
+        prompt_parts = [request.prompt]
+        
+        context_part = None
+        if request.context:
+            context_str = None
+            if ORJSON_AVAILABLE:
+                try:
+                    context_str = orjson.dumps(
+                        request.context, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                    ).decode()
+                except TypeError:
+                    pass  # e.g. integers beyond 64 bits, which json handles
+            if context_str is None:
+                context_str = json.dumps(request.context, indent=2)
+            context_part = f"\n\nAdditional Context:\n{context_str}"
+        
+        if request.code_context:
+            budget = (self.config.context_window
+                      - (request.max_tokens or self.config.max_tokens)
+                      - self._count_tokens(self._build_system_prompt(request.capability))
+                      - self._count_tokens(request.prompt)
+                      - (self._count_tokens(context_part) if context_part else 0)
+                      - _PROMPT_OVERHEAD_TOKENS)
+            code_context = self._truncate_middle(request.code_context, budget)
+            prompt_parts.append(f"\n\nCode Context:\n```\n{code_context}\n```")
+        
+        if context_part:
+            prompt_parts.append(context_part)
+        
+        return "\n".join(prompt_parts)
+    
+    def _build_system_prompt(self, capability: LLMCapability) -> str:
+        """Build system prompt based on capability"""
+        return _SYSTEM_PROMPTS.get(capability, _DEFAULT_SYSTEM_PROMPT)
+    
+    async def _build_request_args(self, build, request: LLMRequest) -> Dict[str, Any]:
+        """Run ``build(request)``, in a worker thread for large prompts
+        
+        Serializing and tokenizing a large code context can take tens of
+        milliseconds, which would otherwise stall the event loop.
+        """
+        if len(request.prompt) + len(request.code_context or '') >= _OFFLOAD_PROMPT_CHARS:
+            return await asyncio.to_thread(build, request)
+        return build(request)
+    
+    def _temperature(self, request: LLMRequest) -> float:
+        """Sampling temperature for a request (0 is a valid override)"""
+        return request.temperature if request.temperature is not None else self.config.temperature
+    
+    def _count_tokens(self, text: str) -> int:
+        """Estimated token count of ``text``"""
+        return -(-len(text) // _CHARS_PER_TOKEN)
+    
+    def _truncate_middle(self, text: str, max_tokens: int) -> str:
+        """``text`` cut from the middle to about ``max_tokens`` tokens"""
+        if self._count_tokens(text) <= max_tokens:
+            return text
+        keep = max(max_tokens, 0) * _CHARS_PER_TOKEN // 2
+        return f"{text[:keep]}\n... [truncated] ...\n{text[len(text) - keep:]}"
+    
+    async def warm_up(self) -> None:
+        """Open a connection to the provider ahead of the first request"""
+        pass
+    
+    async def aclose(self) -> None:
+        """Release network resources held by the provider"""
+        pass
 
 
 class OpenAIProvider(LLMProvider_Interface):
@@ -140,40 +425,36 @@ class OpenAIProvider(LLMProvider_Interface):
     
     def __init__(self, config: LLMConfig):
         super().__init__(config)
-        if not OPENAI_AVAILABLE:
-            raise ImportError("OpenAI library not available. Install with: pip install openai")
+        try:
+            import openai
+        except ImportError:
+            raise ImportError("OpenAI library not available. Install with: pip install openai") from None
         
+        # One long-lived connection pool per provider
         self.client = openai.AsyncOpenAI(
             api_key=config.api_key,
-            base_url=config.base_url
+            base_url=config.base_url,
+            http_client=_http_client(openai, config.timeout, config.compress_requests)
         )
+        self._encoding = None  # tiktoken encoding; False once loading has failed
+    
+    async def warm_up(self) -> None:
+        """Open a connection (TCP + TLS) with a cheap model listing call"""
+        await self.client.with_options(max_retries=0).models.list()
+    
+    async def aclose(self) -> None:
+        """Close the client's HTTP session"""
+        await self.client.close()
     
     async def generate_response(self, request: LLMRequest) -> LLMResponse:
         """Generate response using OpenAI"""
-        if not await self.check_rate_limit():
-            raise Exception("Rate limit exceeded")
+        await self.acquire()
         
         start_time = time.time()
         
-        # Build system prompt based on capability
-        system_prompt = self._build_system_prompt(request.capability)
-        
-        # Build user prompt with context
-        user_prompt = self._build_user_prompt(request)
-        
         try:
-            response = await self.client.chat.completions.create(
-                model=self.config.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=request.max_tokens or self.config.max_tokens,
-                temperature=request.temperature or self.config.temperature,
-                timeout=self.config.timeout
-            )
-            
-            self.update_request_counter()
+            args = await self._build_request_args(self._completion_args, request)
+            response = await self.client.chat.completions.create(**args)
             
             return LLMResponse(
                 content=response.choices[0].message.content,
@@ -191,81 +472,67 @@ class OpenAIProvider(LLMProvider_Interface):
             logger.error(f"OpenAI request failed: {e}")
             raise
     
-    def _build_system_prompt(self, capability: LLMCapability) -> str:
-        """Build system prompt based on capability"""
-        prompts = {
-            LLMCapability.CODE_ANALYSIS: """You are an expert code analyst. Analyze the provided code for:
-- Structure and design patterns
-- Potential bugs and issues
-- Performance optimizations
-- Best practices compliance
-- Security vulnerabilities
-Provide detailed, actionable insights.""",
-            
-            LLMCapability.CODE_GENERATION: """You are an expert software developer. Generate high-quality code that:
-- Follows best practices and conventions
-- Is well-documented and readable
-- Includes error handling
-- Is performant and efficient
-- Follows the specified requirements exactly""",
-            
-            LLMCapability.CODE_REFACTORING: """You are an expert code refactoring specialist. When refactoring code:
-- Maintain existing functionality
-- Improve readability and maintainability
-- Optimize performance where possible
-- Follow modern best practices
-- Provide clear explanations of changes""",
-            
-            LLMCapability.DOCUMENTATION: """You are a technical documentation expert. Create comprehensive documentation that:
-- Is clear and easy to understand
-- Includes examples and use cases
-- Follows standard documentation formats
-- Is accurate and up-to-date
-- Helps developers understand and use the code""",
-            
-            LLMCapability.DEBUGGING: """You are an expert debugger. Help identify and fix issues by:
-- Analyzing error messages and stack traces
-- Identifying root causes
-- Suggesting specific fixes
-- Providing debugging strategies
-- Explaining the underlying problems""",
-            
-            LLMCapability.TESTING: """You are a testing expert. Create comprehensive tests that:
-- Cover all functionality and edge cases
-- Follow testing best practices
-- Are maintainable and readable
-- Include both unit and integration tests
-- Help ensure code quality and reliability""",
-            
-            LLMCapability.ARCHITECTURE: """You are a software architecture expert. Provide architectural guidance that:
-- Considers scalability and maintainability
-- Follows established patterns and principles
-- Balances complexity and simplicity
-- Addresses non-functional requirements
-- Provides clear design decisions""",
-            
-            LLMCapability.SECURITY: """You are a security expert. Analyze code for security issues including:
-- Input validation and sanitization
-- Authentication and authorization
-- Data encryption and protection
-- Common vulnerabilities (OWASP Top 10)
-- Security best practices"""
-        }
-        
-        return prompts.get(capability, "You are a helpful AI assistant for software development.")
-    
-    def _build_user_prompt(self, request: LLMRequest) -> str:
-        """Build user prompt with context"""
-        prompt_parts = [request.prompt]
+    async def stream_response(self, request: LLMRequest) -> AsyncGenerator[str, None]:
+        """Stream response text using OpenAI"""
+        await self.acquire()
         
-        if request.code_context:
-            prompt_parts.append(f"\n\nCode Context:\n```\n{request.code_context}\n```")
+        try:
+            args = await self._build_request_args(self._completion_args, request)
+            stream = await self.client.chat.completions.create(**args, stream=True)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
         
-        if request.context:
-            context_str = json.dumps(request.context, indent=2)
-            prompt_parts.append(f"\n\nAdditional Context:\n{context_str}")
+        except Exception as e:
+            logger.error(f"OpenAI streaming request failed: {e}")
+            raise
+    
+    def _completion_args(self, request: LLMRequest) -> Dict[str, Any]:
+        """Chat completion arguments for a request"""
+        return {
+            "model": self.config.model,
+            "messages": [
+                {"role": "system", "content": self._build_system_prompt(request.capability)},
+                {"role": "user", "content": self._build_user_prompt(request)}
+            ],
+            "max_tokens": request.max_tokens or self.config.max_tokens,
+            "temperature": self._temperature(request),
+            "timeout": self.config.timeout
+        }
+    
+    def _tokenizer(self):
+        """tiktoken encoding for the model, loaded on first use; None if unavailable"""
+        if self._encoding is None and TIKTOKEN_AVAILABLE:
+            try:
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.config.model)
+                except KeyError:  # Model unknown to tiktoken
+                    self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:  # Encoding files could not be fetched
+                logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+                self._encoding = False
+        return self._encoding or None
+    
+    def _count_tokens(self, text: str) -> int:
+        """Token count of ``text`` under the model's tokenizer"""
+        encoding = self._tokenizer()
+        if encoding is None:
+            return super()._count_tokens(text)
+        return len(encoding.encode(text, disallowed_special=()))
+    
+    def _truncate_middle(self, text: str, max_tokens: int) -> str:
+        """``text`` cut from the middle to ``max_tokens`` tokens"""
+        encoding = self._tokenizer()
+        if encoding is None:
+            return super()._truncate_middle(text, max_tokens)
         
-        return "\n".join(prompt_parts)
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        keep = max(max_tokens, 0) // 2
+        head = encoding.decode(tokens[:keep])
+        tail = encoding.decode(tokens[len(tokens) - keep:])
+        return f"{head}\n... [truncated] ...\n{tail}"
 
 
 class AnthropicProvider(LLMProvider_Interface):
@@ -273,43 +540,52 @@ class AnthropicProvider(LLMProvider_Interface):
     
     def __init__(self, config: LLMConfig):
         super().__init__(config)
-        if not ANTHROPIC_AVAILABLE:
-            raise ImportError("Anthropic library not available. Install with: pip install anthropic")
+        try:
+            import anthropic
+        except ImportError:
+            raise ImportError("Anthropic library not available. Install with: pip install anthropic") from None
         
+        # One long-lived connection pool per provider
         self.client = anthropic.AsyncAnthropic(
             api_key=config.api_key,
-            base_url=config.base_url
+            base_url=config.base_url,
+            http_client=_http_client(anthropic, config.timeout, config.compress_requests)
         )
     
+    async def warm_up(self) -> None:
+        """Open a connection (TCP + TLS) with a cheap model listing call"""
+        await self.client.with_options(max_retries=0).models.list()
+    
+    async def aclose(self) -> None:
+        """Close the client's HTTP session"""
+        await self.client.close()
+    
     async def generate_response(self, request: LLMRequest) -> LLMResponse:
         """Generate response using Anthropic Claude"""
-        if not await self.check_rate_limit():
-            raise Exception("Rate limit exceeded")
+        await self.acquire()
         
         start_time = time.time()
         
-        # Build prompt with context
-        full_prompt = self._build_full_prompt(request)
-        
         try:
-            response = await self.client.messages.create(
-                model=self.config.model,
-                max_tokens=request.max_tokens or self.config.max_tokens,
-                temperature=request.temperature or self.config.temperature,
-                messages=[{"role": "user", "content": full_prompt}]
-            )
+            args = await self._build_request_args(self._message_args, request)
+            response = await self.client.messages.create(**args)
             
-            self.update_request_counter()
+            usage = response.usage
+            cache_creation_tokens = getattr(usage, "cache_creation_input_tokens", None) or 0
+            cache_read_tokens = getattr(usage, "cache_read_input_tokens", None) or 0
             
             return LLMResponse(
                 content=response.content[0].text,
                 capability=request.capability,
-                tokens_used=response.usage.input_tokens + response.usage.output_tokens,
+                tokens_used=(usage.input_tokens + usage.output_tokens
+                             + cache_creation_tokens + cache_read_tokens),
                 response_time=time.time() - start_time,
                 confidence=0.85,  # Default confidence for Claude
                 metadata={
                     "model": self.config.model,
-                    "stop_reason": response.stop_reason
+                    "stop_reason": response.stop_reason,
+                    "cache_creation_input_tokens": cache_creation_tokens,
+                    "cache_read_input_tokens": cache_read_tokens
                 }
             )
             
@@ -317,29 +593,48 @@ class AnthropicProvider(LLMProvider_Interface):
             logger.error(f"Anthropic request failed: {e}")
             raise
     
-    def _build_full_prompt(self, request: LLMRequest) -> str:
-        """Build full prompt for Anthropic"""
-        # Similar to OpenAI but in single prompt format
-        system_prompt = self._build_system_prompt(request.capability)
-        user_prompt = self._build_user_prompt(request)
+    async def stream_response(self, request: LLMRequest) -> AsyncGenerator[str, None]:
+        """Stream response text using Anthropic Claude"""
+        await self.acquire()
         
-        return f"{system_prompt}\n\n{user_prompt}"
-    
-    def _build_system_prompt(self, capability: LLMCapability) -> str:
-        """Build system prompt based on capability (same as OpenAI)"""
-        return OpenAIProvider._build_system_prompt(self, capability)
+        try:
+            args = await self._build_request_args(self._message_args, request)
+            async with self.client.messages.stream(**args) as stream:
+                async for text in stream.text_stream:
+                    yield text
+        
+        except Exception as e:
+            logger.error(f"Anthropic streaming request failed: {e}")
+            raise
     
-    def _build_user_prompt(self, request: LLMRequest) -> str:
-        """Build user prompt with context (same as OpenAI)"""
-        return OpenAIProvider._build_user_prompt(self, request)
+    def _message_args(self, request: LLMRequest) -> Dict[str, Any]:
+        """Messages API arguments for a request"""
+        # The capability prompt is static, so send it as a cacheable system block
+        return {
+            "model": self.config.model,
+            "max_tokens": request.max_tokens or self.config.max_tokens,
+            "temperature": self._temperature(request),
+            "system": [{
+                "type": "text",
+                "text": self._build_system_prompt(request.capability),
+                "cache_control": {"type": "ephemeral"}
+            }],
+            "messages": [{"role": "user", "content": self._build_user_prompt(request)}]
+        }
 
 
 class MockProvider(LLMProvider_Interface):
-    """Mock LLM provider for testing and development"""
+    """Mock LLM provider for testing and development
+    
+    Set ``NEUROFORGE_FAST_MOCK=1`` to skip the simulated network delay.
+    """
+    
+    deterministic = True
     
     async def generate_response(self, request: LLMRequest) -> LLMResponse:
         """Generate mock response"""
-        await asyncio.sleep(0.1)  # Simulate network delay
+        if os.environ.get("NEUROFORGE_FAST_MOCK") != "1":
+            await asyncio.sleep(0.1)  # Simulate network delay
         
         mock_responses = {
             LLMCapability.CODE_ANALYSIS: "Mock code analysis: The code looks good with minor improvements needed.",
@@ -364,30 +659,259 @@ class MockProvider(LLMProvider_Interface):
         )
 
 
+def _request_key(request: LLMRequest, provider: LLMProvider) -> str:
+    """Digest identifying a request's content for a provider"""
+    fields = [
+        provider.value, request.capability.value, request.prompt, request.code_context,
+        request.context, request.max_tokens, request.temperature
+    ]
+    payload = None
+    if ORJSON_AVAILABLE:
+        try:
+            payload = orjson.dumps(fields, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+                                   default=str)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits, which default= never sees
+    if payload is None:
+        try:
+            payload = json.dumps(fields, sort_keys=True, default=str).encode()
+        except TypeError:  # mixed key types cannot be sorted
+            payload = json.dumps(fields, default=str).encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class CachingProvider(LLMProvider_Interface):
+    """Persistent (SQLite) response cache in front of another provider
+    
+    Only deterministic requests are cached: any request to a deterministic
+    provider, and temperature-0 requests to the others.
+    """
+    
+    def __init__(self, inner: LLMProvider_Interface, cache_path: Union[str, Path]):
+        super().__init__(inner.config)
+        self.inner = inner
+        self.cache_path = Path(cache_path).expanduser()
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Queries run in worker threads (see _lookup/_store), one at a time
+        self._db = sqlite3.connect(self.cache_path, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response BLOB, ts REAL)"
+        )
+        self._db.commit()
+    
+    def _cache_key(self, request: LLMRequest) -> Optional[str]:
+        if not (self.inner.deterministic or self.inner._temperature(request) == 0):
+            return None
+        return f"{self.config.model}:{_request_key(request, self.config.provider)}"
+    
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._db_lock:
+            row = self._db.execute("SELECT response FROM responses WHERE key = ?",
+                                   (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+    
+    def _store(self, key: str, data: Dict[str, Any]) -> None:
+        blob = json.dumps(data, default=str)
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, ts) VALUES (?, ?, ?)",
+                (key, blob, time.time())
+            )
+            self._db.commit()
+    
+    async def generate_response(self, request: LLMRequest) -> LLMResponse:
+        """Serve from the cache, or generate with the inner provider and store"""
+        start_time = time.time()
+        key = self._cache_key(request)
+        if key is None:
+            return await self.inner.generate_response(request)
+        
+        data = await asyncio.to_thread(self._lookup, key)
+        if data is not None:
+            return LLMResponse(
+                content=data["content"],
+                capability=LLMCapability(data["capability"]),
+                tokens_used=0,
+                response_time=time.time() - start_time,
+                confidence=data["confidence"],
+                metadata={**data["metadata"], "cache_hit": True}
+            )
+        
+        response = await self.inner.generate_response(request)
+        data = {
+            "content": response.content,
+            "capability": response.capability.value,
+            "confidence": response.confidence,
+            "metadata": response.metadata
+        }
+        await asyncio.to_thread(self._store, key, data)
+        return response
+    
+    async def stream_response(self, request: LLMRequest) -> AsyncGenerator[str, None]:
+        async for text in self.inner.stream_response(request):
+            yield text
+    
+    async def warm_up(self) -> None:
+        await self.inner.warm_up()
+    
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+        with self._db_lock:
+            self._db.close()
+
+
+# Provider implementations by provider type; see LLMEngine.register_provider_class
+_PROVIDER_CLASSES: Dict[LLMProvider, Type[LLMProvider_Interface]] = {
+    LLMProvider.OPENAI: OpenAIProvider,
+    LLMProvider.ANTHROPIC: AnthropicProvider,
+    LLMProvider.MOCK: MockProvider,
+}
+
+
+class ResponseCache:
+    """LRU cache of LLM responses with an optional semantic tier
+    
+    Exact hits are keyed by a blake2b digest of the request. When an
+    embedding model is given, a prompt whose embedding is within
+    ``similarity_threshold`` (cosine) of a cached prompt for the same
+    provider, capability and code context also hits.
+    """
+    
+    def __init__(self, max_entries: int = 1024, embedding_model: Optional[str] = None,
+                 similarity_threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, LLMResponse]" = OrderedDict()
+        
+        # Semantic tier: (provider, capability, code hash) -> [(key, embedding)]
+        self._encoder = None
+        self._buckets: Dict[str, List[tuple]] = {}
+        self._bucket_of: Dict[str, str] = {}
+        if embedding_model:
+            if not SENTENCE_TRANSFORMERS_AVAILABLE:
+                raise ImportError("sentence-transformers not available. Install with: pip install sentence-transformers")
+            self._encoder = SentenceTransformer(embedding_model)
+    
+    @staticmethod
+    def _bucket_key(request: LLMRequest, provider: LLMProvider) -> str:
+        code_hash = hashlib.sha256((request.code_context or '').encode()).hexdigest()
+        return f"{provider.value}:{request.capability.value}:{code_hash}"
+    
+    def _embed(self, request: LLMRequest):
+        text = request.prompt + (request.code_context or '')
+        return self._encoder.encode(text, normalize_embeddings=True)
+    
+    def get(self, request: LLMRequest, provider: LLMProvider) -> Optional[LLMResponse]:
+        """Cached response for ``request``, or None"""
+        key = _request_key(request, provider)
+        response = self._entries.get(key)
+        
+        if response is None and self._encoder is not None:
+            bucket = self._buckets.get(self._bucket_key(request, provider))
+            if bucket:
+                keys, embeddings = zip(*bucket)
+                scores = np.stack(embeddings) @ self._embed(request)
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    key = keys[best]
+                    response = self._entries[key]
+        
+        if response is not None:
+            self._entries.move_to_end(key)
+        return response
+    
+    def put(self, request: LLMRequest, provider: LLMProvider, response: LLMResponse) -> None:
+        """Store ``response`` for ``request``, evicting the least recently used entry"""
+        key = _request_key(request, provider)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self._entries[key] = response
+            return
+        
+        self._entries[key] = response
+        if self._encoder is not None:
+            bucket_key = self._bucket_key(request, provider)
+            self._buckets.setdefault(bucket_key, []).append((key, self._embed(request)))
+            self._bucket_of[key] = bucket_key
+        
+        if len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            bucket_key = self._bucket_of.pop(evicted, None)
+            if bucket_key is not None:
+                bucket = [entry for entry in self._buckets[bucket_key] if entry[0] != evicted]
+                if bucket:
+                    self._buckets[bucket_key] = bucket
+                else:
+                    del self._buckets[bucket_key]
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        self._buckets.clear()
+        self._bucket_of.clear()
+
+
 class LLMEngine:
-    """Main LLM engine orchestrating all providers and capabilities"""
+    """Main LLM engine orchestrating all providers and capabilities
+
+    Create one engine per process and share it: each engine owns its
+    providers' connection pools, caches and warm-up tasks. With FastAPI::
+
+        @asynccontextmanager
+        async def lifespan(app):
+            async with get_shared_engine() as engine:
+                app.state.llm_engine = engine
+                yield
+
+    ``workspace_root`` is only the default for requests that carry no
+    ``workspace_path``, so one engine can serve any number of workspaces.
+    """
     
-    def __init__(self, workspace_root: str = "."):
+    def __init__(self, workspace_root: str = ".", response_cache: Optional[ResponseCache] = None,
+                 history_size: int = 10_000, cache_path: Optional[Union[str, Path]] = None):
         self.workspace_root = Path(workspace_root)
         self.providers: Dict[LLMProvider, LLMProvider_Interface] = {}
+        self._provider_classes = dict(_PROVIDER_CLASSES)
+        self.cache_path = cache_path  # e.g. "~/.neuroforge/cache.sqlite"
         self.default_provider = None
-        self.request_history: List[Dict[str, Any]] = []
+        # Most recent requests, with running totals kept in step for get_request_stats
+        self.request_history: Deque[RequestLogEntry] = deque(maxlen=history_size)
+        self._total_tokens = 0
+        self._total_response_time = 0.0
+        self._total_confidence = 0.0
+        self._capabilities_used: Counter = Counter()
+        self._providers_used: Counter = Counter()
+        self.response_cache = response_cache
+        self._inflight: Dict[str, _InflightCall] = {}
+        self._warmups: Dict[LLMProvider, asyncio.Task] = {}
         
         print("NeuroForge LLM Engine initialized")
     
-    def register_provider(self, config: LLMConfig, is_default: bool = False) -> None:
-        """Register an LLM provider"""
+    def register_provider_class(self, provider: LLMProvider,
+                                provider_class: Type[LLMProvider_Interface]) -> None:
+        """Use ``provider_class`` for configs of type ``provider`` (e.g. LOCAL)"""
+        self._provider_classes[provider] = provider_class
+    
+    def register_provider(self, config: LLMConfig, is_default: bool = False,
+                          warm_up: bool = True) -> None:
+        """Register an LLM provider
+        
+        When called inside a running event loop, the provider's connection is
+        warmed up in the background; the first request waits for it.
+        """
         try:
-            if config.provider == LLMProvider.OPENAI:
-                provider = OpenAIProvider(config)
-            elif config.provider == LLMProvider.ANTHROPIC:
-                provider = AnthropicProvider(config)
-            elif config.provider == LLMProvider.MOCK:
-                provider = MockProvider(config)
-            else:
+            provider_class = self._provider_classes.get(config.provider)
+            if provider_class is None:
                 raise ValueError(f"Unsupported provider: {config.provider}")
+            provider = provider_class(config)
+            if self.cache_path is not None:
+                provider = CachingProvider(provider, self.cache_path)
             
             self.providers[config.provider] = provider
+            if warm_up and type(provider).warm_up is not LLMProvider_Interface.warm_up:
+                self._start_warm_up(config.provider, provider)
             
             if is_default or not self.default_provider:
                 self.default_provider = config.provider
@@ -398,6 +922,26 @@ class LLMEngine:
             logger.error(f"Failed to register provider {config.provider.value}: {e}")
             raise
     
+    def _start_warm_up(self, name: LLMProvider, provider: LLMProvider_Interface) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # No loop yet; the first request opens the connection
+            return
+        
+        async def warm_up():
+            try:
+                await provider.warm_up()
+            except Exception as e:
+                logger.debug(f"Warm-up for {name.value} failed: {e}")
+        
+        self._warmups[name] = loop.create_task(warm_up())
+    
+    async def _await_warm_up(self, provider: LLMProvider) -> None:
+        warmup = self._warmups.get(provider)
+        if warmup is not None:
+            await asyncio.shield(warmup)
+            self._warmups.pop(provider, None)
+    
     async def generate_response(self, request: LLMRequest, 
                               provider: Optional[LLMProvider] = None) -> LLMResponse:
         """Generate response using specified or default provider"""
@@ -410,22 +954,98 @@ class LLMEngine:
         if not request.workspace_path:
             request.workspace_path = str(self.workspace_root)
         
+        # Identical concurrent requests share one provider call, which runs in
+        # its own task so that it outlives any one caller being cancelled
+        key = _request_key(request, provider)
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            task = asyncio.get_running_loop().create_task(self._generate(request, provider))
+            inflight = self._inflight[key] = _InflightCall(task)
+            task.add_done_callback(lambda _: self._forget_inflight(key, inflight))
+        
+        inflight.waiters += 1
+        try:
+            return await asyncio.shield(inflight.task)
+        finally:
+            inflight.waiters -= 1
+            if not inflight.waiters and not inflight.task.done():
+                inflight.task.cancel()  # Nobody is waiting for the result any more
+    
+    def _forget_inflight(self, key: str, inflight: _InflightCall) -> None:
+        if self._inflight.get(key) is inflight:
+            del self._inflight[key]
+        if not inflight.task.cancelled():
+            inflight.task.exception()  # Waiters re-raise it; don't log it as unretrieved
+    
+    async def generate_response_hedged(self, request: LLMRequest, providers: List[LLMProvider],
+                                       hedge_delay: float = 0.5) -> LLMResponse:
+        """Generate a response, hedging across several providers
+        
+        Providers are tried in order: the next one starts whenever the
+        running ones have not answered within ``hedge_delay`` seconds or one
+        of them fails. The first successful response wins and the remaining
+        calls are cancelled. Providers that are not registered or lack the
+        request's capability are skipped.
+        """
+        candidates = iter([
+            provider for provider in providers
+            if provider in self.providers
+            and request.capability in self.providers[provider].config.capabilities
+        ])
+        first = next(candidates, None)
+        if first is None:
+            raise ValueError(f"No registered provider supports {request.capability.value}")
+        
+        tasks = {asyncio.create_task(self.generate_response(request, first))}
+        errors: List[BaseException] = []
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, timeout=hedge_delay,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+                
+                # Hedge: a call failed or is slow, so bring in the next provider
+                following = next(candidates, None)
+                if following is not None:
+                    tasks.add(asyncio.create_task(self.generate_response(request, following)))
+            raise errors[-1]
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _generate(self, request: LLMRequest, provider: LLMProvider) -> LLMResponse:
+        """Serve a request from the cache or the provider and record it"""
+        await self._await_warm_up(provider)
         start_time = time.time()
         
         try:
-            response = await self.providers[provider].generate_response(request)
+            cached = self.response_cache.get(request, provider) if self.response_cache else None
+            if cached is not None:
+                response = replace(
+                    cached,
+                    tokens_used=0,
+                    response_time=time.time() - start_time,
+                    metadata={**cached.metadata, "cache_hit": True}
+                )
+            else:
+                response = await self.providers[provider].generate_response(request)
+                if self.response_cache is not None:
+                    self.response_cache.put(request, provider, response)
             
             # Log request/response for analysis
-            self.request_history.append({
-                "timestamp": start_time,
-                "provider": provider.value,
-                "capability": request.capability.value,
-                "prompt_length": len(request.prompt),
-                "response_length": len(response.content),
-                "tokens_used": response.tokens_used,
-                "response_time": response.response_time,
-                "confidence": response.confidence
-            })
+            self._record_request(RequestLogEntry(
+                timestamp=start_time,
+                provider=provider.value,
+                capability=request.capability.value,
+                prompt_length=len(request.prompt),
+                response_length=len(response.content),
+                tokens_used=response.tokens_used,
+                response_time=response.response_time,
+                confidence=response.confidence
+            ))
             
             return response
             
@@ -433,6 +1053,41 @@ class LLMEngine:
             logger.error(f"LLM request failed: {e}")
             raise
     
+    async def stream_response(self, request: LLMRequest,
+                              provider: Optional[LLMProvider] = None) -> AsyncGenerator[str, None]:
+        """Yield response text from the specified or default provider as it arrives
+        
+        Streamed requests bypass the response cache and are not recorded in
+        the request history, since token usage is not reported.
+        """
+        provider = provider or self.default_provider
+        
+        if provider not in self.providers:
+            raise ValueError(f"Provider {provider} not registered")
+        
+        if not request.workspace_path:
+            request.workspace_path = str(self.workspace_root)
+        
+        await self._await_warm_up(provider)
+        async for text in self.providers[provider].stream_response(request):
+            yield text
+    
+    async def batch_generate(self, requests: List[LLMRequest],
+                             provider: Optional[LLMProvider] = None,
+                             max_concurrency: int = 8) -> List[LLMResponse]:
+        """Generate responses for several requests concurrently
+        
+        At most ``max_concurrency`` requests are in flight at once; responses
+        are returned in request order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def run(request: LLMRequest) -> LLMResponse:
+            async with semaphore:
+                return await self.generate_response(request, provider)
+        
+        return await asyncio.gather(*(run(request) for request in requests))
+    
     async def analyze_code(self, code: str, context: Dict[str, Any] = None) -> LLMResponse:
         """Analyze code for issues and improvements"""
         request = LLMRequest(
@@ -443,6 +1098,20 @@ class LLMEngine:
         )
         return await self.generate_response(request)
     
+    async def batch_analyze_code(self, codes: List[str], context: Dict[str, Any] = None,
+                                 max_concurrency: int = 8) -> List[LLMResponse]:
+        """Analyze several code snippets concurrently"""
+        requests = [
+            LLMRequest(
+                prompt="Analyze this code for potential issues, improvements, and best practices:",
+                capability=LLMCapability.CODE_ANALYSIS,
+                code_context=code,
+                context=dict(context or {})
+            )
+            for code in codes
+        ]
+        return await self.batch_generate(requests, max_concurrency=max_concurrency)
+    
     async def generate_code(self, prompt: str, context: Dict[str, Any] = None) -> LLMResponse:
         """Generate code based on requirements"""
         request = LLMRequest(
@@ -496,6 +1165,24 @@ class LLMEngine:
         )
         return await self.generate_response(request)
     
+    async def aclose(self) -> None:
+        """Close every provider's HTTP session and cancel pending warm-ups"""
+        global _shared_engine
+        with _shared_engine_lock:
+            if _shared_engine is self:
+                _shared_engine = None
+        for warmup in self._warmups.values():
+            warmup.cancel()
+        self._warmups.clear()
+        for provider in self.providers.values():
+            await provider.aclose()
+    
+    async def __aenter__(self) -> 'LLMEngine':
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+    
     def get_available_providers(self) -> List[LLMProvider]:
         """Get list of registered providers"""
         return list(self.providers.keys())
@@ -506,33 +1193,62 @@ class LLMEngine:
             return self.providers[provider].config.capabilities
         return []
     
+    def _record_request(self, entry: RequestLogEntry) -> None:
+        """Append to the request history, updating the running totals"""
+        if len(self.request_history) == self.request_history.maxlen:
+            self._update_totals(self.request_history[0], -1)
+        self.request_history.append(entry)
+        self._update_totals(entry, 1)
+    
+    def _update_totals(self, entry: RequestLogEntry, sign: int) -> None:
+        self._total_tokens += sign * entry.tokens_used
+        self._total_response_time += sign * entry.response_time
+        self._total_confidence += sign * entry.confidence
+        for counter, name in ((self._capabilities_used, entry.capability),
+                              (self._providers_used, entry.provider)):
+            counter[name] += sign
+            if not counter[name]:
+                del counter[name]
+    
     def get_request_stats(self) -> Dict[str, Any]:
-        """Get statistics about LLM usage"""
+        """Get statistics about LLM usage (over the retained request history)"""
         if not self.request_history:
             return {"total_requests": 0}
         
         total_requests = len(self.request_history)
-        total_tokens = sum(req["tokens_used"] for req in self.request_history)
-        avg_response_time = sum(req["response_time"] for req in self.request_history) / total_requests
-        avg_confidence = sum(req["confidence"] for req in self.request_history) / total_requests
-        
-        capabilities_used = {}
-        for req in self.request_history:
-            cap = req["capability"]
-            capabilities_used[cap] = capabilities_used.get(cap, 0) + 1
         
         return {
             "total_requests": total_requests,
-            "total_tokens": total_tokens,
-            "average_response_time": avg_response_time,
-            "average_confidence": avg_confidence,
-            "capabilities_used": capabilities_used,
-            "providers_used": list(set(req["provider"] for req in self.request_history))
+            "total_tokens": self._total_tokens,
+            "average_response_time": self._total_response_time / total_requests,
+            "average_confidence": self._total_confidence / total_requests,
+            "capabilities_used": dict(self._capabilities_used),
+            "providers_used": list(self._providers_used)
         }
 
 
+_shared_engine: Optional[LLMEngine] = None
+_shared_engine_lock = threading.Lock()
+
+
+def get_shared_engine() -> LLMEngine:
+    """Return the process-wide engine, creating it on first use
+
+    Providers are registered on it once at startup; closing it (``aclose``
+    or leaving ``async with``) lets the next call create a fresh engine.
+    """
+    global _shared_engine
+    if _shared_engine is None:
+        with _shared_engine_lock:
+            if _shared_engine is None:
+                _shared_engine = LLMEngine()
+    return _shared_engine
+
+
 # Example usage and testing
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
     async def test_llm_engine():
         """Test the LLM engine with mock provider"""
         engine = LLMEngine()
@@ -571,4 +1287,4 @@ def calculate_sum(a, b):
         print("\n✅ LLM Engine test completed!")
     
     # Run test
-    asyncio.run(test_llm_engine())
+    run(test_llm_engine())
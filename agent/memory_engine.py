@@ -10,25 +10,48 @@ License: MIT
 """
 
 import asyncio
+import functools
 import json
+import math
+import os
+import queue
+import re
 import sqlite3
+import struct
+import threading
 import time
 import uuid
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import Future
 from dataclasses import dataclass, asdict
+from itertools import chain, islice
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union, Tuple
-from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Dict, List, Optional, Any, Set, Union, Tuple
+from datetime import datetime, timedelta, timezone
 
 import lmdb
+import numpy as np
+# chromadb and GitPython are slow to import, so they are imported on first use
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 try:
-    import chromadb
-    CHROMADB_AVAILABLE = True
+    from pybloomfilter import BloomFilter
+    PYBLOOMFILTER_AVAILABLE = True
 except ImportError:
-    CHROMADB_AVAILABLE = False
-    chromadb = None
+    PYBLOOMFILTER_AVAILABLE = False
 
 from pydantic import BaseModel
-import git
 
 
 @dataclass
@@ -41,6 +64,101 @@ class MemoryContext:
     session_id: str
     workspace_path: Optional[str] = None
     git_hash: Optional[str] = None
+    content_size: Optional[int] = None  # len(str(content)), set on insert
+
+
+@dataclass(slots=True)
+class MemoryEnginePerf:
+    """Performance counters maintained in place by the memory engine"""
+    cache_hit_rate: float = 0.0
+    average_search_time: float = 0.0
+    storage_efficiency: float = 0.0
+    index_size: int = 0
+
+
+@dataclass
+class MemoryColumns:
+    """Columnar (struct-of-arrays) view of a set of memories for analytics.
+    
+    Each field is a parallel array indexed by memory position; tags are
+    stored CSR-style, with the tags of memory ``i`` being
+    ``tags_values[tags_offsets[i]:tags_offsets[i + 1]]``.
+    """
+    types: np.ndarray
+    workspaces: np.ndarray
+    sizes: np.ndarray
+    last_accessed: np.ndarray
+    access_count: np.ndarray
+    tags_offsets: np.ndarray
+    tags_values: np.ndarray
+    created_at: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.types)
+    
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        """Row (dict) view of a single memory for legacy consumers"""
+        start, end = self.tags_offsets[index], self.tags_offsets[index + 1]
+        return {
+            'type': self.types[index],
+            'workspace': self.workspaces[index],
+            'size': int(self.sizes[index]),
+            'last_accessed': float(self.last_accessed[index]),
+            'access_count': int(self.access_count[index]),
+            'tags': self.tags_values[start:end].tolist(),
+            'created_at': float(self.created_at[index])
+        }
+    
+    @classmethod
+    def from_rows(cls, types: List[Any], workspaces: List[Any], sizes: List[int],
+                  last_accessed: List[float], access_count: List[int],
+                  tags: List[List[str]], created_at: List[float]) -> "MemoryColumns":
+        """Build columns from per-field lists"""
+        tags_offsets = np.zeros(len(tags) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, tags), dtype=np.int64, count=len(tags)),
+                  out=tags_offsets[1:])
+        tags_values = np.empty(int(tags_offsets[-1]), dtype=object)
+        tags_values[:] = list(chain.from_iterable(tags))
+        
+        return cls(
+            types=np.array(types, dtype=object),
+            workspaces=np.array(workspaces, dtype=object),
+            sizes=np.array(sizes, dtype=np.int64),
+            last_accessed=np.array(last_accessed, dtype=np.float64),
+            access_count=np.array(access_count, dtype=np.int64),
+            tags_offsets=tags_offsets,
+            tags_values=tags_values,
+            created_at=np.array(created_at, dtype=np.float64)
+        )
+    
+    @classmethod
+    def from_column_rows(cls, rows: List[Dict[str, Any]]) -> "MemoryColumns":
+        """Build columns from rows shaped like ``__getitem__`` output"""
+        return cls.from_rows(
+            types=[r['type'] for r in rows],
+            workspaces=[r['workspace'] for r in rows],
+            sizes=[r['size'] for r in rows],
+            last_accessed=[r['last_accessed'] for r in rows],
+            access_count=[r['access_count'] for r in rows],
+            tags=[r['tags'] for r in rows],
+            created_at=[r['created_at'] for r in rows]
+        )
+    
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]],
+                     default_time: Optional[float] = None) -> "MemoryColumns":
+        """Build columns from dict records (as returned by dict-based engines)"""
+        default_time = time.time() if default_time is None else default_time
+        return cls.from_rows(
+            types=[r.get('type', 'unknown') for r in records],
+            workspaces=[r.get('workspace', 'unknown') for r in records],
+            sizes=[r['content_size'] if r.get('content_size') is not None
+                   else len(str(r.get('content', ''))) for r in records],
+            last_accessed=[r.get('last_accessed', 0) for r in records],
+            access_count=[r.get('access_count', 0) for r in records],
+            tags=[list(r.get('tags', ())) for r in records],
+            created_at=[r.get('created_at', default_time) for r in records]
+        )
 
 
 class MemoryConfig(BaseModel):
@@ -50,87 +168,638 @@ class MemoryConfig(BaseModel):
     max_ram_size: int = 1000  # Max items in RAM buffer
     enable_encryption: bool = False
     vector_dimension: int = 384
+    # sync=False defers fsync to periodic checkpoints: a crash can lose the
+    # most recent commits, but the database itself stays consistent
+    lmdb_sync: bool = True
+    lmdb_writemap: bool = True
+    vector_batch_size: int = 128  # Contexts per ChromaDB add() call
+    heavy_git: bool = False  # Use GitPython to report dirty/untracked state
+    ram_buffer_soa: bool = False  # Compact column storage for large RAM buffers
+    single_thread_embedder: bool = False  # One ONNX thread per embedding call
     
 
+def _find_git_dir(workspace_path: str) -> Optional[str]:
+    """The workspace's git directory, following a ``.git`` file (worktrees)"""
+    dot_git = os.path.join(workspace_path, '.git')
+    if os.path.isdir(dot_git):
+        return dot_git
+    try:
+        with open(dot_git) as f:
+            line = f.readline().strip()
+    except OSError:
+        return None
+    if line.startswith('gitdir: '):
+        return os.path.join(workspace_path, line[len('gitdir: '):])
+    return None
+
+
+def _read_head(git_dir: str) -> Tuple[Optional[str], Optional[str]]:
+    """(branch, sha) parsed from HEAD; branch is None when detached, sha before the first commit"""
+    try:
+        with open(os.path.join(git_dir, 'HEAD')) as f:
+            head = f.read().strip()
+    except OSError:
+        return None, None
+    if not head.startswith('ref: '):
+        return None, head or None
+    
+    ref = head[len('ref: '):]
+    branch = ref[len('refs/heads/'):] if ref.startswith('refs/heads/') else None
+    # Worktrees keep their refs in the main repository's git directory
+    try:
+        with open(os.path.join(git_dir, 'commondir')) as f:
+            common_dir = os.path.join(git_dir, f.read().strip())
+    except OSError:
+        common_dir = git_dir
+    
+    try:
+        with open(os.path.join(common_dir, ref)) as f:
+            return branch, f.read().strip()
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(common_dir, 'packed-refs')) as f:
+            for line in f:
+                sha, _, name = line.rstrip('\n').partition(' ')
+                if name == ref:
+                    return branch, sha
+    except OSError:
+        pass
+    return branch, None
+
+
+class _GhostList:
+    """Recently seen keys, for admitting a key to a buffer on its second load"""
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._keys: "OrderedDict[str, None]" = OrderedDict()
+    
+    def admit(self, key: str) -> bool:
+        """True if ``key`` was seen recently; remembers it otherwise"""
+        if key in self._keys:
+            del self._keys[key]
+            return True
+        self._keys[key] = None
+        if len(self._keys) > self.max_size:
+            self._keys.popitem(last=False)
+        return False
+    
+    def clear(self) -> None:
+        self._keys.clear()
+
+
 class RAMBuffer:
     """Fast in-memory buffer for active contexts"""
     
     def __init__(self, max_size: int = 1000):
         self.max_size = max_size
-        self._buffer: Dict[str, MemoryContext] = {}
-        self._access_times: Dict[str, float] = {}
+        # Kept in recency order: least recently used first
+        self._buffer: "OrderedDict[str, MemoryContext]" = OrderedDict()
+        self._ghost = _GhostList(2 * max_size)
     
     def get(self, key: str) -> Optional[MemoryContext]:
-        """Get item from buffer, updating access time"""
-        if key in self._buffer:
-            self._access_times[key] = time.time()
-            return self._buffer[key]
-        return None
+        """Get item from buffer, marking it most recently used"""
+        context = self._buffer.get(key)
+        if context is not None:
+            self._buffer.move_to_end(key)
+        return context
     
     def put(self, key: str, context: MemoryContext) -> None:
         """Store item in buffer, evicting LRU if needed"""
-        if len(self._buffer) >= self.max_size:
-            self._evict_lru()
-        
+        if key in self._buffer:
+            self._buffer.move_to_end(key)
         self._buffer[key] = context
-        self._access_times[key] = time.time()
+        if len(self._buffer) > self.max_size:
+            self._buffer.popitem(last=False)
     
-    def _evict_lru(self) -> None:
-        """Remove least recently used item"""
-        if not self._access_times:
-            return
+    def touch(self, key: str, context: MemoryContext) -> None:
+        """Cache a context loaded from storage once it is loaded a second time
         
-        lru_key = min(self._access_times.keys(), key=lambda k: self._access_times[k])
-        del self._buffer[lru_key]
-        del self._access_times[lru_key]
+        One-off reads, such as a scan, then never evict hot contexts.
+        """
+        if self._ghost.admit(key):
+            self.put(key, context)
     
     def clear(self) -> None:
         """Clear all items from buffer"""
         self._buffer.clear()
-        self._access_times.clear()
+        self._ghost.clear()
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _timestamp_ns(timestamp: datetime) -> int:
+    """Exact nanoseconds since the epoch; naive datetimes are taken as UTC"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return (timestamp - _EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def _from_timestamp_ns(ns: int) -> datetime:
+    """Inverse of ``_timestamp_ns``, as an aware UTC datetime"""
+    return _EPOCH + timedelta(microseconds=ns // 1000)
+
+
+class RAMBufferSoA:
+    """RAM buffer storing contexts column-wise in fixed-size arrays
+    
+    Each context occupies a slot across parallel arrays (timestamps and
+    sizes in numpy int64, content as one encoded blob) instead of keeping
+    its object graph alive; ``get`` rebuilds a ``MemoryContext`` from its
+    slot. Same LRU behaviour and interface as ``RAMBuffer``.
+    """
+    
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max_size
+        # id -> slot, kept in recency order: least recently used first
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._free: List[int] = list(range(max_size - 1, -1, -1))
+        self._ids: List[Optional[str]] = [None] * max_size
+        self._timestamps = np.zeros(max_size, dtype=np.int64)  # ns since epoch, UTC
+        self._content_sizes = np.full(max_size, -1, dtype=np.int64)  # -1 for None
+        self._tags: List[Tuple[str, ...]] = [()] * max_size
+        self._content_blobs: List[bytes] = [b''] * max_size
+        self._session_ids: List[Optional[str]] = [None] * max_size
+        self._workspace_paths: List[Optional[str]] = [None] * max_size
+        self._git_hashes: List[Optional[str]] = [None] * max_size
+        self._ghost = _GhostList(2 * max_size)
+    
+    def get(self, key: str) -> Optional[MemoryContext]:
+        """Get item from buffer, marking it most recently used"""
+        slot = self._slots.get(key)
+        if slot is None:
+            return None
+        self._slots.move_to_end(key)
+        return self._context(slot)
+    
+    def put(self, key: str, context: MemoryContext) -> None:
+        """Store item in buffer, evicting LRU if needed"""
+        if self.max_size <= 0:
+            return
+        slot = self._slots.get(key)
+        if slot is not None:
+            self._slots.move_to_end(key)
+        else:
+            if not self._free:
+                _, evicted = self._slots.popitem(last=False)
+                self._free.append(evicted)
+            slot = self._free.pop()
+            self._slots[key] = slot
+        
+        self._ids[slot] = context.id
+        self._timestamps[slot] = _timestamp_ns(context.timestamp)
+        self._content_sizes[slot] = -1 if context.content_size is None else context.content_size
+        self._tags[slot] = tuple(context.tags)
+        self._content_blobs[slot] = _encode_content(context.content)
+        self._session_ids[slot] = context.session_id
+        self._workspace_paths[slot] = context.workspace_path
+        self._git_hashes[slot] = context.git_hash
+    
+    def _context(self, slot: int) -> MemoryContext:
+        content_size = int(self._content_sizes[slot])
+        return MemoryContext(
+            id=self._ids[slot],
+            content=_decode_content(self._content_blobs[slot]),
+            tags=list(self._tags[slot]),
+            timestamp=_from_timestamp_ns(int(self._timestamps[slot])),
+            session_id=self._session_ids[slot],
+            workspace_path=self._workspace_paths[slot],
+            git_hash=self._git_hashes[slot],
+            content_size=None if content_size < 0 else content_size
+        )
+    
+    def touch(self, key: str, context: MemoryContext) -> None:
+        """Cache a context loaded from storage once it is loaded a second time"""
+        if self._ghost.admit(key):
+            self.put(key, context)
+    
+    def clear(self) -> None:
+        """Clear all items from buffer"""
+        self._slots.clear()
+        self._ghost.clear()
+        self._free = list(range(self.max_size - 1, -1, -1))
+        self._ids = [None] * self.max_size
+        self._tags = [()] * self.max_size
+        self._content_blobs = [b''] * self.max_size
+        self._session_ids = [None] * self.max_size
+        self._workspace_paths = [None] * self.max_size
+        self._git_hashes = [None] * self.max_size
+
+
+# MessagePack extension type holding an integer too wide for 64 bits, as decimal text
+_BIG_INT_EXT = 1
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, int):
+        return msgpack.ExtType(_BIG_INT_EXT, str(value).encode())
+    return str(value)
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == _BIG_INT_EXT:
+        return int(data)
+    return msgpack.ExtType(code, data)
+
+
+def _encode_content(content: Dict[str, Any]) -> bytes:
+    """MessagePack when available, JSON otherwise; non-native values become strings"""
+    if MSGPACK_AVAILABLE:
+        return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+    return json.dumps(content, default=str).encode()
+
+
+def _decode_content(value: Union[bytes, memoryview]) -> Any:
+    # JSON values are objects; a MessagePack map never starts with "{"
+    if value[:1] == b'{':
+        return json.loads(bytes(value))
+    return msgpack.unpackb(value, raw=False, strict_map_key=False, ext_hook=_msgpack_ext_hook)
+
+
+# Binary MemoryContext record: header, then length-prefixed UTF-8 tags,
+# session_id, workspace_path and git_hash, then the encoded content
+_CONTEXT_MAGIC = 0xC1  # Never the first byte of MessagePack or JSON
+_CONTEXT_HEADER = struct.Struct('<B16sqqH')  # magic, id, timestamp ns, content_size, tag count
+_STR_LENGTH = struct.Struct('<I')
+_NONE_LENGTH = 0xFFFFFFFF
+_ENCODE_BUF = threading.local()  # Per-thread scratch buffer records are packed into
+
+
+def _encode_context(context: MemoryContext) -> Optional[bytes]:
+    """Binary record for a context, or None unless its id is a canonical UUID"""
+    try:
+        context_uuid = uuid.UUID(context.id)
+    except ValueError:
+        return None
+    if str(context_uuid) != context.id:
+        return None
+    
+    strings = [tag.encode() for tag in context.tags]
+    for value in (context.session_id, context.workspace_path, context.git_hash):
+        strings.append(None if value is None else value.encode())
+    content = _encode_content(context.content)
+    size = (_CONTEXT_HEADER.size + _STR_LENGTH.size * len(strings)
+            + sum(len(s) for s in strings if s is not None) + len(content))
+    
+    buf = getattr(_ENCODE_BUF, 'buf', None)
+    if buf is None or len(buf) < size:
+        buf = _ENCODE_BUF.buf = bytearray(max(4096, size, 2 * len(buf or ())))
+    
+    content_size = -1 if context.content_size is None else context.content_size
+    _CONTEXT_HEADER.pack_into(buf, 0, _CONTEXT_MAGIC, context_uuid.bytes, _timestamp_ns(context.timestamp),
+                              content_size, len(context.tags))
+    offset = _CONTEXT_HEADER.size
+    for s in strings:
+        if s is None:
+            _STR_LENGTH.pack_into(buf, offset, _NONE_LENGTH)
+            offset += _STR_LENGTH.size
+        else:
+            _STR_LENGTH.pack_into(buf, offset, len(s))
+            offset += _STR_LENGTH.size
+            buf[offset:offset + len(s)] = s
+            offset += len(s)
+    buf[offset:size] = content
+    with memoryview(buf) as view:
+        return bytes(view[:size])
+
+
+def _decode_context(value: Union[bytes, memoryview]) -> MemoryContext:
+    """Inverse of ``_encode_context``"""
+    _, id_bytes, ns, content_size, tag_count = _CONTEXT_HEADER.unpack_from(value)
+    offset = _CONTEXT_HEADER.size
+    strings: List[Optional[str]] = []
+    for _ in range(tag_count + 3):
+        (length,) = _STR_LENGTH.unpack_from(value, offset)
+        offset += _STR_LENGTH.size
+        if length == _NONE_LENGTH:
+            strings.append(None)
+        else:
+            strings.append(str(value[offset:offset + length], 'utf-8'))
+            offset += length
+    
+    return MemoryContext(
+        id=str(uuid.UUID(bytes=bytes(id_bytes))),
+        content=_decode_content(value[offset:]),
+        tags=strings[:tag_count],
+        timestamp=_from_timestamp_ns(ns),
+        session_id=strings[tag_count],
+        workspace_path=strings[tag_count + 1],
+        git_hash=strings[tag_count + 2],
+        content_size=None if content_size < 0 else content_size
+    )
+
+
+# Background LMDB writer: contexts queued within this window share a transaction
+_WRITE_BATCH_SIZE = 256
+_WRITE_BATCH_WAIT = 0.005  # seconds
+# Without sync, flush LMDB to disk after this many written contexts
+_CHECKPOINT_WRITES = 1000
+# Finished read transactions py-lmdb keeps for reuse (reset, then renewed by
+# the next begin()) instead of allocating and registering a new reader
+_SPARE_READ_TXNS = 16
+# Bloom filter of stored context IDs, letting lookups of unknown IDs skip LMDB
+_ID_FILTER_CAPACITY = 1_000_000
+_ID_FILTER_ERROR_RATE = 0.001
 
 
 class PersistentStore:
-    """LMDB-based persistent storage for session data"""
+    """LMDB-based persistent storage for session data
     
-    def __init__(self, db_path: str):
+    Writes are queued and committed in batches by a background thread, so
+    storing never blocks the event loop on a commit. Contexts still waiting
+    in the queue are served from ``_pending``. Contexts that fail to commit
+    stay there too and are queued again by the next ``flush`` or ``close``.
+    """
+    
+    def __init__(self, db_path: str, sync: bool = True, writemap: bool = True):
         self.db_path = Path(db_path)
         self.db_path.mkdir(parents=True, exist_ok=True)
-        self.env = lmdb.open(str(self.db_path), max_dbs=5, map_size=100 * 1024 * 1024)  # 100MB
+        self.sync = sync
+        self.writemap = writemap
+        self.env = lmdb.open(
+            str(self.db_path), max_dbs=5, map_size=100 * 1024 * 1024,  # 100MB
+            writemap=writemap, metasync=sync, sync=sync, map_async=not sync,
+            max_readers=256, max_spare_txns=_SPARE_READ_TXNS
+        )
+        self._unsynced_writes = 0
+        self._id_filter = self._open_id_filter() if PYBLOOMFILTER_AVAILABLE else None
+        
+        self._pending: Dict[str, MemoryContext] = {}
+        self._pending_lock = threading.Lock()
+        # Contexts whose write failed, and the last such failure
+        self._failed: Dict[str, MemoryContext] = {}
+        self._write_error: Optional[BaseException] = None
+        # MemoryContext to write, Future to resolve once earlier writes commit, or None to stop
+        self._write_queue: "queue.Queue[Union[MemoryContext, Future, None]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="lmdb-writer", daemon=True)
+        self._writer.start()
+    
+    def _open_id_filter(self) -> "BloomFilter":
+        """ID filter saved by the last clean close, or one rebuilt from the keys"""
+        path = self.db_path / "id_filter.bloom"
+        # Written on close and removed while open, so a crash forces a rebuild
+        marker = self.db_path / "id_filter.count"
+        try:
+            saved_entries = int(marker.read_text())
+            marker.unlink()
+        except (OSError, ValueError):
+            saved_entries = None
+        
+        if saved_entries == self.env.stat()['entries'] and path.exists():
+            return BloomFilter.open(str(path))
+        
+        id_filter = BloomFilter(_ID_FILTER_CAPACITY, _ID_FILTER_ERROR_RATE, str(path))
+        with self.env.begin(buffers=True) as txn:
+            for key in txn.cursor().iternext(keys=True, values=False):
+                id_filter.add(bytes(key).decode())
+        return id_filter
     
     def store_context(self, context: MemoryContext) -> None:
-        """Store memory context in LMDB"""
+        """Queue memory context for the background LMDB writer"""
+        if self._id_filter is not None:
+            self._id_filter.add(context.id)
+        with self._pending_lock:
+            self._pending[context.id] = context
+            # The new version replaces any that failed to write
+            self._failed.pop(context.id, None)
+        self._write_queue.put(context)
+    
+    def flush(self) -> Future:
+        """Future resolved once every context queued so far is committed
+        
+        Contexts whose earlier writes failed are queued again first. The
+        future fails if any of them still cannot be written.
+        """
+        self._requeue_failed()
+        done: Future = Future()
+        self._write_queue.put(done)
+        return done
+    
+    def _requeue_failed(self) -> None:
+        with self._pending_lock:
+            failed, self._failed = self._failed, {}
+        for context in failed.values():
+            self._write_queue.put(context)
+    
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._write_queue.get()]
+            try:
+                while len(batch) < _WRITE_BATCH_SIZE and batch[-1] is not None:
+                    batch.append(self._write_queue.get(timeout=_WRITE_BATCH_WAIT))
+            except queue.Empty:
+                pass
+            
+            contexts = [item for item in batch if isinstance(item, MemoryContext)]
+            if contexts:
+                self._write_contexts(contexts)
+            
+            with self._pending_lock:
+                error = self._write_error if self._failed else None
+            for item in batch:
+                if isinstance(item, Future) and item.set_running_or_notify_cancel():
+                    if error is None:
+                        item.set_result(None)
+                    else:
+                        item.set_exception(error)
+            if batch[-1] is None:
+                return
+    
+    def _write_contexts(self, contexts: List[MemoryContext]) -> None:
+        """Commit contexts, one at a time if the batch fails, so a bad context
+        only holds back itself; failures stay in ``_pending``"""
+        failed = []
+        try:
+            self._write_batch(contexts)
+        except Exception:
+            for context in contexts:
+                try:
+                    self._write_batch([context])
+                except Exception as e:
+                    print(f"Warning: failed to persist memory context {context.id}: {e}")
+                    failed.append(context)
+                    self._write_error = e
+        
+        failed_ids = {id(context) for context in failed}
+        with self._pending_lock:
+            for context in contexts:
+                if self._pending.get(context.id) is not context:
+                    continue  # Superseded by a newer store_context
+                if id(context) in failed_ids:
+                    self._failed[context.id] = context
+                else:
+                    del self._pending[context.id]
+        
+        if not self.sync:
+            self._unsynced_writes += len(contexts) - len(failed)
+            if self._unsynced_writes >= _CHECKPOINT_WRITES:
+                try:
+                    self.checkpoint()
+                except Exception as e:
+                    print(f"Warning: failed to sync memory store: {e}")
+    
+    def _write_batch(self, contexts: List[MemoryContext]) -> None:
+        """Store contexts in a single LMDB write transaction"""
+        encode = self._encode
         with self.env.begin(write=True) as txn:
-            key = context.id.encode()
-            value = json.dumps(asdict(context), default=str).encode()
-            txn.put(key, value)
+            for context in contexts:
+                txn.put(context.id.encode(), encode(context))
+    
+    def read_txn(self) -> lmdb.Transaction:
+        """Read transaction (a context manager) for passing to several reads
+        
+        Values are buffers into the memory map, valid only until it ends.
+        """
+        return self.env.begin(buffers=True)
     
-    def get_context(self, context_id: str) -> Optional[MemoryContext]:
+    def get_context(self, context_id: str,
+                    txn: Optional[lmdb.Transaction] = None) -> Optional[MemoryContext]:
         """Retrieve memory context from LMDB"""
-        with self.env.begin() as txn:
-            key = context_id.encode()
-            value = txn.get(key)
-            if value:
-                data = json.loads(value.decode())
-                # Convert timestamp back to datetime
-                data['timestamp'] = datetime.fromisoformat(data['timestamp'])
-                return MemoryContext(**data)
-        return None
+        pending = self._pending.get(context_id)
+        if pending is not None:
+            return pending
+        if self._id_filter is not None and context_id not in self._id_filter:
+            return None
+        if txn is None:
+            with self.read_txn() as txn:
+                return self.get_context(context_id, txn)
+        
+        # Decode before the txn ends
+        value = txn.get(context_id.encode())
+        return self._decode(value) if value else None
     
-    def list_contexts(self, limit: int = 100) -> List[str]:
+    def get_many(self, context_ids: List[str],
+                 txn: Optional[lmdb.Transaction] = None) -> List[Optional[MemoryContext]]:
+        """Retrieve several memory contexts using a single read transaction"""
+        if txn is None:
+            with self.read_txn() as txn:
+                return self.get_many(context_ids, txn)
+        
+        contexts = []
+        for context_id in context_ids:
+            context = self._pending.get(context_id)
+            if context is None and (self._id_filter is None or context_id in self._id_filter):
+                value = txn.get(context_id.encode())
+                if value:
+                    context = self._decode(value)
+            contexts.append(context)
+        return contexts
+    
+    @staticmethod
+    def _encode(context: MemoryContext) -> bytes:
+        encoded = _encode_context(context)
+        if encoded is not None:
+            return encoded
+        data = asdict(context)
+        # Integer nanoseconds decode with arithmetic instead of ISO parsing
+        data['timestamp'] = _timestamp_ns(context.timestamp)
+        return _encode_content(data)
+    
+    @staticmethod
+    def _decode(value: Union[bytes, memoryview]) -> MemoryContext:
+        if value[0] == _CONTEXT_MAGIC:
+            return _decode_context(value)
+        data = _decode_content(value)
+        timestamp = data['timestamp']
+        if isinstance(timestamp, int):
+            data['timestamp'] = _from_timestamp_ns(timestamp)
+        else:
+            # Stored as an ISO string before timestamps were nanoseconds
+            data['timestamp'] = datetime.fromisoformat(timestamp)
+        return MemoryContext(**data)
+    
+    def list_contexts(self, limit: int = 100,
+                      txn: Optional[lmdb.Transaction] = None) -> List[str]:
         """List all context IDs"""
+        if txn is None:
+            with self.read_txn() as txn:
+                return self.list_contexts(limit, txn)
+        
         contexts = []
-        with self.env.begin() as txn:
+        for key in txn.cursor().iternext(keys=True, values=False):
+            contexts.append(bytes(key).decode())
+            if len(contexts) >= limit:
+                break
+        return contexts
+    
+    def sample_contexts(self, k: int) -> List[MemoryContext]:
+        """Approximately uniform sample of up to ``k`` stored contexts
+        
+        Context IDs are random UUIDs, so seeking to a fresh random UUID
+        lands on a uniformly chosen key without walking the database.
+        """
+        contexts = {}
+        with self.read_txn() as txn:
             cursor = txn.cursor()
-            for key, _ in cursor:
-                contexts.append(key.decode())
-                if len(contexts) >= limit:
+            for _ in range(k):
+                if not cursor.set_range(str(uuid.uuid4()).encode()) and not cursor.first():
                     break
-        return contexts
+                key = bytes(cursor.key())
+                if key not in contexts:
+                    contexts[key] = self._decode(cursor.value())
+        
+        return list(contexts.values())
+    
+    def checkpoint(self) -> None:
+        """Force committed writes to disk (needed when opened without sync)"""
+        self.env.sync(True)
+        self._unsynced_writes = 0
     
     def close(self) -> None:
-        """Close LMDB environment"""
+        """Commit queued writes, sync and close LMDB environment
+        
+        Raises ``lmdb.Error`` if some contexts could not be written.
+        """
+        if self._writer.is_alive():
+            self._requeue_failed()
+            self._write_queue.put(None)
+            self._writer.join()
+        self.checkpoint()
+        if self._id_filter is not None:
+            self._id_filter.sync()
+            self._id_filter.close()
+            (self.db_path / "id_filter.count").write_text(str(self.env.stat()['entries']))
         self.env.close()
+        if self._failed:
+            raise lmdb.Error(f"{len(self._failed)} memory contexts could not be persisted") \
+                from self._write_error
+
+
+# Fixed statement text, so sqlite3's statement cache can reuse the prepared statements
+_INSERT_TASK_SQL = "INSERT OR REPLACE INTO tasks (id, name, status, workspace_path, metadata, metadata_blob) VALUES (?, ?, ?, ?, ?, ?)"
+_SELECT_TASK_METADATA_SQL = "SELECT metadata, metadata_blob FROM tasks WHERE id = ?"
+_SELECT_WORKSPACE_SQL = "SELECT git_branch, git_hash, open_files, last_updated FROM workspace_state WHERE workspace_path = ?"
+_UPSERT_WORKSPACE_SQL = "INSERT OR REPLACE INTO workspace_state (workspace_path, git_branch, git_hash, open_files) VALUES (?, ?, ?, ?)"
+
+
+def _json_text(value: Any) -> str:
+    """JSON text for a SQLite TEXT column, via orjson when available"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits, which json handles
+    return json.dumps(value)
+
+
+# Task metadata of exactly these int32 fields is packed into metadata_blob
+# instead of being written as JSON text
+_TASK_META_KEYS = ('status_code', 'duration_ms')
+_TASK_META_PACKER = struct.Struct("<ii")
+
+
+def _task_metadata_columns(metadata: Dict[str, Any]) -> Tuple[Optional[str], Optional[bytes]]:
+    """(metadata, metadata_blob) column values for task metadata"""
+    if len(metadata) == len(_TASK_META_KEYS):
+        try:
+            values = [metadata[key] for key in _TASK_META_KEYS]
+            if all(type(value) is int for value in values):
+                return None, _TASK_META_PACKER.pack(*values)
+        except (KeyError, struct.error):
+            pass
+    return _json_text(metadata), None
 
 
 class StructuredStore:
@@ -139,8 +808,18 @@ class StructuredStore:
     def __init__(self, db_path: str):
         self.db_path = Path(db_path) / "structured.db"
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        # Autocommit; WAL lets reads proceed during writes and syncs less often
+        self.conn = sqlite3.connect(str(self.db_path), isolation_level=None,
+                                    check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-65536;
+            PRAGMA mmap_size=268435456;
+        """)
         self._init_tables()
+        self._insert_task = functools.partial(self.conn.execute, _INSERT_TASK_SQL)
     
     def _init_tables(self) -> None:
         """Initialize database tables"""
@@ -152,9 +831,13 @@ class StructuredStore:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 completed_at TIMESTAMP,
                 workspace_path TEXT,
-                metadata TEXT
+                metadata TEXT,
+                metadata_blob BLOB
             )
         """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+        if 'metadata_blob' not in columns:
+            self.conn.execute("ALTER TABLE tasks ADD COLUMN metadata_blob BLOB")
         
         self.conn.execute("""
             CREATE TABLE IF NOT EXISTS workspace_state (
@@ -165,26 +848,38 @@ class StructuredStore:
                 last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
-        
-        self.conn.commit()
     
     def store_task(self, task_id: str, name: str, status: str, 
                    workspace_path: str, metadata: Dict[str, Any]) -> None:
         """Store task information"""
-        self.conn.execute("""
-            INSERT OR REPLACE INTO tasks 
-            (id, name, status, workspace_path, metadata)
-            VALUES (?, ?, ?, ?, ?)
-        """, (task_id, name, status, workspace_path, json.dumps(metadata)))
-        self.conn.commit()
+        self._insert_task((task_id, name, status, workspace_path,
+                           *_task_metadata_columns(metadata)))
+    
+    def store_tasks_bulk(self, tasks: List[Tuple[str, str, str, str, Dict[str, Any]]]) -> None:
+        """Store many ``(task_id, name, status, workspace_path, metadata)`` tasks in one transaction"""
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.executemany(_INSERT_TASK_SQL, [
+                (task_id, name, status, workspace_path, *_task_metadata_columns(metadata))
+                for task_id, name, status, workspace_path, metadata in tasks
+            ])
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+    
+    def get_task_metadata(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Metadata stored with a task, whichever column holds it"""
+        row = self.conn.execute(_SELECT_TASK_METADATA_SQL, (task_id,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None:
+            return dict(zip(_TASK_META_KEYS, _TASK_META_PACKER.unpack(row[1])))
+        return json.loads(row[0]) if row[0] else {}
     
     def get_workspace_state(self, workspace_path: str) -> Optional[Dict[str, Any]]:
         """Get current workspace state"""
-        cursor = self.conn.execute("""
-            SELECT git_branch, git_hash, open_files, last_updated 
-            FROM workspace_state 
-            WHERE workspace_path = ?
-        """, (workspace_path,))
+        cursor = self.conn.execute(_SELECT_WORKSPACE_SQL, (workspace_path,))
         
         row = cursor.fetchone()
         if row:
@@ -199,79 +894,190 @@ class StructuredStore:
     def update_workspace_state(self, workspace_path: str, git_branch: str,
                               git_hash: str, open_files: List[str]) -> None:
         """Update workspace state"""
-        self.conn.execute("""
-            INSERT OR REPLACE INTO workspace_state
-            (workspace_path, git_branch, git_hash, open_files)
-            VALUES (?, ?, ?, ?)
-        """, (workspace_path, git_branch, git_hash, json.dumps(open_files)))
-        self.conn.commit()
+        self.conn.execute(_UPSERT_WORKSPACE_SQL,
+                          (workspace_path, git_branch, git_hash, _json_text(open_files)))
+
+
+# Tokenizer and hashed term-frequency width for the text search used without ChromaDB
+_TOKEN_RE = re.compile(r"\w+")
+_HASH_BUCKETS = 1024  # power of two
+
+
+def _hashed_tf(counts: Dict[str, float]) -> np.ndarray:
+    """Unit-length term vector with tokens hashed into ``_HASH_BUCKETS`` buckets"""
+    vector = np.zeros(_HASH_BUCKETS, dtype=np.float32)
+    buckets = np.fromiter((hash(token) & (_HASH_BUCKETS - 1) for token in counts),
+                          dtype=np.intp, count=len(counts))
+    np.add.at(vector, buckets, np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
 
 
 class VectorStore:
-    """ChromaDB-based vector storage for semantic search"""
+    """ChromaDB-based vector storage for semantic search
     
-    def __init__(self, db_path: str):
-        if not CHROMADB_AVAILABLE:
+    Contexts are added to ChromaDB in batches of ``batch_size``; pending
+    contexts are flushed before every search and on close.
+    """
+    
+    _chromadb: Any = None  # chromadb module once imported, False if unavailable
+    
+    @classmethod
+    def _import_chromadb(cls) -> Any:
+        if cls._chromadb is None:
+            try:
+                import chromadb
+                cls._chromadb = chromadb
+            except ImportError:
+                cls._chromadb = False
+        return cls._chromadb
+    
+    # Embedding functions shared by every store in the process, by single_thread
+    _embedders: Dict[bool, Any] = {}
+    
+    @classmethod
+    def _shared_embedder(cls, single_thread: bool = False) -> Any:
+        """Chroma's default MiniLM embedder, loaded once per process
+        
+        With ``single_thread``, its ONNX session is limited to one thread,
+        since letting ONNX Runtime use every core makes concurrent embedding
+        calls slower. That relies on chromadb internals, so any failure falls
+        back to the default session.
+        """
+        embedder = cls._embedders.get(single_thread)
+        if embedder is None:
+            from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+            embedder = ONNXMiniLM_L6_V2()
+            # Newer chromadb builds the session lazily in a cached property
+            if single_thread and isinstance(getattr(ONNXMiniLM_L6_V2, 'model', None),
+                                            functools.cached_property):
+                try:
+                    import onnxruntime
+                    options = onnxruntime.SessionOptions()
+                    options.intra_op_num_threads = 1
+                    options.inter_op_num_threads = 1
+                    embedder._download_model_if_not_exists()
+                    embedder.model = onnxruntime.InferenceSession(
+                        os.path.join(embedder.DOWNLOAD_PATH, embedder.EXTRACTED_FOLDER_NAME, "model.onnx"),
+                        providers=["CPUExecutionProvider"],
+                        sess_options=options
+                    )
+                except Exception as e:
+                    print(f"Warning: using default ONNX threading for embeddings: {e}")
+                    embedder = ONNXMiniLM_L6_V2()
+            cls._embedders[single_thread] = embedder
+        return embedder
+    
+    def __init__(self, db_path: str, batch_size: int = 128,
+                 single_thread_embedder: bool = False):
+        self.batch_size = batch_size
+        chromadb = self._import_chromadb()
+        if not chromadb:
             print("Warning: ChromaDB not available, using simple text matching")
             self.client = None
             self.collection = None
             self._simple_store = {}
+            # Inverted index (token -> context ids) selects the contexts holding
+            # every query token; rows of the term-vector matrix rank them
+            self._postings: Dict[str, Set[str]] = defaultdict(set)
+            self._rows: Dict[str, int] = {}
+            self._row_ids: List[str] = []
+            self._tf = np.zeros((0, _HASH_BUCKETS), dtype=np.float32)
             return
             
+        self._embedder = self._shared_embedder(single_thread_embedder)
         self.client = chromadb.PersistentClient(path=db_path)
         self.collection = self.client.get_or_create_collection(
             name="neuroforge_memory",
-            metadata={"hnsw:space": "cosine"}
+            metadata={"hnsw:space": "cosine"},
+            embedding_function=self._embedder
         )
+        self._pending_docs: List[str] = []
+        self._pending_ids: List[str] = []
+        self._pending_meta: List[Dict[str, Any]] = []
+    
+    @staticmethod
+    def _metadata(context: MemoryContext) -> Dict[str, Any]:
+        return {
+            'id': context.id,
+            'tags': ','.join(context.tags),
+            'timestamp': context.timestamp.isoformat(),
+            'session_id': context.session_id
+        }
     
-    def add_context(self, context: MemoryContext, embedding: Optional[List[float]] = None) -> None:
-        """Add context to vector store"""
-        if not CHROMADB_AVAILABLE:
+    def add_context(self, context: MemoryContext, embedding: Optional[List[float]] = None,
+                    text: Optional[str] = None) -> None:
+        """Add context to vector store
+        
+        ``text`` is the JSON text of ``context.content`` when the caller
+        has already serialized it.
+        """
+        text_content = _json_text(context.content) if text is None else text
+        if self.collection is None:
             # Simple text storage fallback
-            text_content = json.dumps(context.content)
+            if context.id in self._simple_store:
+                self._unindex(context.id)
             self._simple_store[context.id] = {
                 'content': text_content,
-                'metadata': {
-                    'id': context.id,
-                    'tags': ','.join(context.tags),
-                    'timestamp': context.timestamp.isoformat(),
-                    'session_id': context.session_id
-                }
+                'metadata': self._metadata(context)
             }
+            self._index(context.id, text_content)
             return
             
         # For now, use simple text representation
         # In production, would use proper embeddings
-        text_content = json.dumps(context.content)
+        self._pending_docs.append(text_content)
+        self._pending_ids.append(context.id)
+        self._pending_meta.append(self._metadata(context))
+        if len(self._pending_ids) >= self.batch_size:
+            self.flush()
+    
+    def _index(self, context_id: str, text: str) -> None:
+        counts = Counter(_TOKEN_RE.findall(text.lower()))
+        for token in counts:
+            self._postings[token].add(context_id)
+        
+        row = self._rows.get(context_id)
+        if row is None:
+            row = len(self._row_ids)
+            if row == len(self._tf):
+                # Grow by doubling
+                grown = np.zeros((max(64, 2 * row), _HASH_BUCKETS), dtype=np.float32)
+                grown[:row] = self._tf
+                self._tf = grown
+            self._rows[context_id] = row
+            self._row_ids.append(context_id)
+        self._tf[row] = _hashed_tf(counts)
+    
+    def _unindex(self, context_id: str) -> None:
+        # The matrix row is kept and overwritten when the context is re-indexed
+        for token in set(_TOKEN_RE.findall(self._simple_store[context_id]['content'].lower())):
+            postings = self._postings[token]
+            postings.discard(context_id)
+            if not postings:
+                del self._postings[token]
+    
+    def flush(self) -> None:
+        """Add pending contexts to the collection in one call"""
+        if self.collection is None or not self._pending_ids:
+            return
         
         self.collection.add(
-            documents=[text_content],
-            metadatas=[{
-                'id': context.id,
-                'tags': ','.join(context.tags),
-                'timestamp': context.timestamp.isoformat(),
-                'session_id': context.session_id
-            }],
-            ids=[context.id]
+            documents=self._pending_docs,
+            embeddings=self._embedder(self._pending_docs),
+            metadatas=self._pending_meta,
+            ids=self._pending_ids
         )
+        self._pending_docs = []
+        self._pending_ids = []
+        self._pending_meta = []
     
     def search_similar(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
         """Search for similar contexts"""
-        if not CHROMADB_AVAILABLE:
-            # Simple text matching fallback
-            results = []
-            query_lower = query.lower()
-            for context_id, data in self._simple_store.items():
-                content = data['content'].lower()
-                if query_lower in content:
-                    # Simple scoring based on query length vs content length
-                    score = len(query) / len(content) if content else 0
-                    results.append((context_id, score))
-            
-            # Sort by score and return top results
-            results.sort(key=lambda x: x[1], reverse=True)
-            return results[:limit]
+        if self.collection is None:
+            return self._search_index(query, limit)
         
+        self.flush()
         results = self.collection.query(
             query_texts=[query],
             n_results=limit
@@ -281,6 +1087,38 @@ class VectorStore:
         if results['ids'] and results['distances']:
             return list(zip(results['ids'][0], results['distances'][0]))
         return []
+    
+    def _search_index(self, query: str, limit: int) -> List[Tuple[str, float]]:
+        """Contexts containing every query token, by IDF-weighted cosine similarity"""
+        terms = set(_TOKEN_RE.findall(query.lower()))
+        if not terms:
+            # An empty query matches everything
+            return [(context_id, 0.0) for context_id in islice(self._simple_store, limit)]
+        
+        postings = [self._postings.get(term) for term in terms]
+        if not all(postings):
+            return []
+        candidates = set.intersection(*sorted(postings, key=len))
+        
+        num_docs = len(self._row_ids)
+        query_vector = _hashed_tf({
+            term: math.log(1 + (num_docs - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in zip(terms, postings)
+        })
+        rows = np.fromiter(map(self._rows.__getitem__, candidates), dtype=np.intp, count=len(candidates))
+        if 4 * len(rows) < num_docs:
+            scores = self._tf[rows] @ query_vector
+        else:
+            # One pass over the whole matrix beats copying most of its rows
+            scores = (self._tf[:num_docs] @ query_vector)[rows]
+        
+        if len(rows) > limit:
+            top = np.argpartition(-scores, limit)[:limit]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        row_ids = self._row_ids
+        return [(row_ids[rows[i]], float(scores[i])) for i in top]
 
 
 class MemoryEngine:
@@ -291,9 +1129,11 @@ class MemoryEngine:
         self.session_id = str(uuid.uuid4())
         
         # Initialize storage backends
-        self.ram_buffer = RAMBuffer(config.max_ram_size)
+        buffer_class = RAMBufferSoA if config.ram_buffer_soa else RAMBuffer
+        self.ram_buffer = buffer_class(config.max_ram_size)
         self.persistent_store = PersistentStore(
-            str(Path(config.workspace_path) / config.memory_store_path / "persistent")
+            str(Path(config.workspace_path) / config.memory_store_path / "persistent"),
+            sync=config.lmdb_sync, writemap=config.lmdb_writemap
         )
         self.structured_store = StructuredStore(
             str(Path(config.workspace_path) / config.memory_store_path)
@@ -301,17 +1141,40 @@ class MemoryEngine:
         
         # Initialize vector store with ChromaDB availability check
         self.vector_store = VectorStore(
-            str(Path(config.workspace_path) / config.memory_store_path / "vector")
+            str(Path(config.workspace_path) / config.memory_store_path / "vector"),
+            batch_size=config.vector_batch_size,
+            single_thread_embedder=config.single_thread_embedder
         )
         
-        # Git integration for workspace awareness
-        try:
-            self.git_repo = git.Repo(config.workspace_path)
-        except git.exc.GitError:
-            self.git_repo = None
+        # Git integration for workspace awareness: branch and HEAD are read
+        # from the git directory; GitPython is only needed for dirty checks
+        self._git_dir = _find_git_dir(config.workspace_path)
+        self.git_repo = None
+        if config.heavy_git and self._git_dir:
+            try:
+                import git
+            except ImportError:
+                print("Warning: GitPython not available, skipping dirty-tree detection")
+            else:
+                try:
+                    self.git_repo = git.Repo(config.workspace_path)
+                except git.exc.GitError:
+                    pass
+        # (branch, HEAD sha) and the HEAD/index mtimes they were read at
+        self._git_cache: Tuple[Optional[str], Optional[str]] = (None, None)
+        self._git_cache_key: Optional[Tuple[int, int]] = None
+        
+        # Performance counters, updated as operations happen
+        self.perf = MemoryEnginePerf(index_size=self.persistent_store.env.stat()['entries'])
+        self._cache_lookups = 0
+        self._cache_hits = 0
+        
+        # Callbacks notified with a column row for every stored memory
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._search_count = 0
             
         print(f"NeuroForge Memory Engine initialized")
-        if not CHROMADB_AVAILABLE:
+        if self.vector_store.collection is None:
             print("Note: Using simplified search without ChromaDB vector embeddings")
     
     async def store_memory(self, content: Dict[str, Any], tags: List[str] = None) -> str:
@@ -320,12 +1183,7 @@ class MemoryEngine:
         context_id = str(uuid.uuid4())
         
         # Get current git state
-        git_hash = None
-        if self.git_repo:
-            try:
-                git_hash = self.git_repo.head.commit.hexsha
-            except:
-                pass
+        _, git_hash = self._git_state()
         
         context = MemoryContext(
             id=context_id,
@@ -334,51 +1192,134 @@ class MemoryEngine:
             timestamp=datetime.now(timezone.utc),
             session_id=self.session_id,
             workspace_path=self.config.workspace_path,
-            git_hash=git_hash
+            git_hash=git_hash,
+            content_size=len(str(content))
         )
         
-        # Store in all backends
+        # Store in all backends; LMDB encoding happens on the writer thread
         self.ram_buffer.put(context_id, context)
         self.persistent_store.store_context(context)
-        self.vector_store.add_context(context)
+        self.vector_store.add_context(context, text=_json_text(content))
+        self.perf.index_size += 1
+        
+        if self._listeners:
+            row = self._column_row(context)
+            for listener in self._listeners:
+                listener(row)
         
         return context_id
     
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Call ``callback`` with the column row of each newly stored memory"""
+        self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Stop notifying a callback registered with ``add_listener``"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    @staticmethod
+    def _column_row(context: MemoryContext) -> Dict[str, Any]:
+        """Row values for a memory, matching ``MemoryColumns.__getitem__``"""
+        created_at = context.timestamp.timestamp()
+        size = context.content_size
+        return {
+            'type': context.content.get('type', 'unknown'),
+            'workspace': context.workspace_path or 'unknown',
+            'size': len(str(context.content)) if size is None else size,
+            'last_accessed': created_at,
+            'access_count': 0,
+            'tags': context.tags,
+            'created_at': created_at
+        }
+    
     async def retrieve_memory(self, context_id: str) -> Optional[MemoryContext]:
         """Retrieve memory context by ID"""
         # Check RAM buffer first
+        self._cache_lookups += 1
         context = self.ram_buffer.get(context_id)
         if context:
+            self._cache_hits += 1
+            self.perf.cache_hit_rate = self._cache_hits / self._cache_lookups
             return context
+        self.perf.cache_hit_rate = self._cache_hits / self._cache_lookups
         
         # Check persistent store
         context = self.persistent_store.get_context(context_id)
         if context:
-            # Cache in RAM for future access
-            self.ram_buffer.put(context_id, context)
+            # Cache in RAM if it is read again soon
+            self.ram_buffer.touch(context_id, context)
             return context
         
         return None
     
-    async def search_memories(self, query: str, tags: List[str] = None, 
-                            limit: int = 10) -> List[MemoryContext]:
-        """Search memories using vector similarity"""
+    async def retrieve_memories(self, context_ids: List[str]) -> List[Optional[MemoryContext]]:
+        """Retrieve several memory contexts, reading RAM misses in one LMDB transaction"""
+        contexts = [self.ram_buffer.get(context_id) for context_id in context_ids]
+        misses = [i for i, context in enumerate(contexts) if context is None]
+        if context_ids:
+            self._cache_lookups += len(context_ids)
+            self._cache_hits += len(context_ids) - len(misses)
+            self.perf.cache_hit_rate = self._cache_hits / self._cache_lookups
+        
+        if misses:
+            loaded = self.persistent_store.get_many([context_ids[i] for i in misses])
+            for i, context in zip(misses, loaded):
+                if context is not None:
+                    # Cache in RAM if it is read again soon
+                    self.ram_buffer.touch(context_ids[i], context)
+                    contexts[i] = context
+        return contexts
+    
+    async def search_memories_iter(self, query: str, tags: List[str] = None,
+                                   limit: int = 10) -> AsyncIterator[MemoryContext]:
+        """Yield matching memories one at a time instead of building a list"""
         similar_ids = self.vector_store.search_similar(query, limit * 2)  # Get more for filtering
+        contexts = await self.retrieve_memories([context_id for context_id, _ in similar_ids])
         
-        memories = []
-        for context_id, _ in similar_ids:
-            context = await self.retrieve_memory(context_id)
+        found = 0
+        for context in contexts:
             if context:
                 # Filter by tags if specified
                 if tags and not any(tag in context.tags for tag in tags):
                     continue
-                memories.append(context)
+                yield context
+                found += 1
                 
-                if len(memories) >= limit:
+                if found >= limit:
                     break
+    
+    def _record_search_time(self, start_time: float) -> None:
+        self._search_count += 1
+        elapsed = time.perf_counter() - start_time
+        self.perf.average_search_time += (elapsed - self.perf.average_search_time) / self._search_count
+    
+    async def search_memories(self, query: str, tags: List[str] = None, 
+                            limit: int = 10) -> List[MemoryContext]:
+        """Search memories using vector similarity"""
+        start_time = time.perf_counter()
+        memories = [m async for m in self.search_memories_iter(query, tags=tags, limit=limit)]
+        self._record_search_time(start_time)
         
         return memories
     
+    async def search_memories_columns(self, query: str, tags: List[str] = None,
+                                      limit: int = 10) -> MemoryColumns:
+        """Search memories and return the results in columnar form"""
+        start_time = time.perf_counter()
+        column_row = self._column_row
+        
+        # Reduce each memory to its column row as it arrives
+        rows = [column_row(m) async for m in self.search_memories_iter(query, tags=tags, limit=limit)]
+        
+        self._record_search_time(start_time)
+        return MemoryColumns.from_column_rows(rows)
+    
+    async def sample_memories(self, k: int = 2000) -> MemoryColumns:
+        """Columns for a random sample of about ``k`` stored memories"""
+        contexts = self.persistent_store.sample_contexts(k)
+        return MemoryColumns.from_column_rows([self._column_row(c) for c in contexts])
+    
     async def get_workspace_context(self) -> Dict[str, Any]:
         """Get current workspace context"""
         context = {
@@ -388,36 +1329,70 @@ class MemoryEngine:
         }
         
         # Add git information
-        if self.git_repo:
-            try:
-                context.update({
-                    'git_branch': self.git_repo.active_branch.name,
-                    'git_hash': self.git_repo.head.commit.hexsha,
-                    'git_dirty': self.git_repo.is_dirty(),
-                    'git_untracked': len(self.git_repo.untracked_files) > 0
-                })
-            except:
-                pass
+        git_branch, git_hash = self._git_state()
+        if git_branch and git_hash:
+            context.update({
+                'git_branch': git_branch,
+                'git_hash': git_hash
+            })
+            if self.git_repo:
+                try:
+                    context.update({
+                        'git_dirty': self.git_repo.is_dirty(),
+                        'git_untracked': len(self.git_repo.untracked_files) > 0
+                    })
+                except:
+                    pass
         
         return context
     
     async def update_workspace_state(self, open_files: List[str] = None) -> None:
         """Update current workspace state"""
-        if not self.git_repo:
+        git_branch, git_hash = self._git_state()
+        if not (git_branch and git_hash):
             return
         
         try:
             self.structured_store.update_workspace_state(
                 self.config.workspace_path,
-                self.git_repo.active_branch.name,
-                self.git_repo.head.commit.hexsha,
+                git_branch,
+                git_hash,
                 open_files or []
             )
         except:
             pass
     
+    def _git_state(self) -> Tuple[Optional[str], Optional[str]]:
+        """Current (branch, HEAD sha), either None when unavailable
+        
+        Cached until ``.git/HEAD`` or ``.git/index`` changes: checkouts
+        rewrite HEAD and commits rewrite the index.
+        """
+        git_dir = self._git_dir
+        if not git_dir:
+            return None, None
+        
+        key = []
+        for name in ('HEAD', 'index'):
+            try:
+                key.append(os.stat(os.path.join(git_dir, name)).st_mtime_ns)
+            except OSError:
+                key.append(0)
+        key = tuple(key)
+        if key == self._git_cache_key:
+            return self._git_cache
+        
+        self._git_cache = _read_head(git_dir)
+        self._git_cache_key = key
+        return self._git_cache
+    
+    async def flush(self) -> None:
+        """Wait until every stored memory has been committed to LMDB"""
+        await asyncio.wrap_future(self.persistent_store.flush())
+    
     def close(self) -> None:
         """Clean shutdown of memory engine"""
+        self.vector_store.flush()
         self.ram_buffer.clear()
         self.persistent_store.close()
 
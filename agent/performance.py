@@ -3,23 +3,40 @@ NeuroForge Performance Optimization Module
 Author: Muzan Sano
 
 Advanced performance monitoring and optimization features for NeuroForge
+
+The metrics history stores percentages and memory sizes as float32, so
+values kept there are exact only to about 7 significant digits.
 """
 
 import asyncio
+import gc
+import os
+import sys
 import time
+import numpy as np
 import psutil
 import threading
-from typing import Dict, List, Optional, Any, Callable
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any, Callable, Tuple
+from dataclasses import dataclass, fields
 from pathlib import Path
 import json
 import logging
 from contextlib import asynccontextmanager
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_INV_MB = 1 / 1024 / 1024  # bytes -> MB
+# The monitor skips missed samples once it falls this many intervals behind
+_MAX_MISSED_INTERVALS = 5
+
 @dataclass
 class PerformanceMetrics:
     """Performance metrics for monitoring system performance"""
@@ -35,7 +52,98 @@ class PerformanceMetrics:
     open_files: int
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return {
+            'timestamp': self.timestamp,
+            'cpu_percent': self.cpu_percent,
+            'memory_mb': self.memory_mb,
+            'memory_percent': self.memory_percent,
+            'disk_io_read': self.disk_io_read,
+            'disk_io_write': self.disk_io_write,
+            'network_sent': self.network_sent,
+            'network_recv': self.network_recv,
+            'active_threads': self.active_threads,
+            'open_files': self.open_files
+        }
+
+# Column types of the metrics history, one per PerformanceMetrics field:
+# narrow where the range allows, 64-bit for timestamps and byte counters
+_METRIC_DTYPES = {
+    'timestamp': np.float64,
+    'cpu_percent': np.float32,
+    'memory_mb': np.float32,
+    'memory_percent': np.float32,
+    'disk_io_read': np.int64,
+    'disk_io_write': np.int64,
+    'network_sent': np.int64,
+    'network_recv': np.int64,
+    'active_threads': np.int32,
+    'open_files': np.int32,
+}
+
+class MetricsRing:
+    """Fixed-capacity history of PerformanceMetrics stored column-wise
+    
+    Each field is a preallocated numpy array written in place, so appending
+    a sample neither allocates nor copies; once full, the oldest sample is
+    overwritten. Integer indexing returns a ``PerformanceMetrics`` built on
+    demand, oldest first (negative indices count from the newest).
+    """
+    
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._head = 0  # Slot the next sample is written to
+        self._count = 0
+        self.columns: Dict[str, np.ndarray] = {
+            f.name: np.zeros(capacity, dtype=_METRIC_DTYPES[f.name])
+            for f in fields(PerformanceMetrics)
+        }
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def append(self, metrics: PerformanceMetrics) -> None:
+        """Store a sample, overwriting the oldest once full"""
+        head = self._head
+        for name, column in self.columns.items():
+            column[head] = getattr(metrics, name)
+        self._head = (head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+    
+    def slots(self, n: Optional[int] = None) -> np.ndarray:
+        """Slots of the last ``n`` samples (all by default), oldest first"""
+        k = self._count if n is None else min(n, self._count)
+        return (self._head - k + np.arange(k)) % self.capacity
+    
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        """Values of one field over the last ``n`` samples, oldest first"""
+        return self.columns[name].take(self.slots(n))
+    
+    def __getitem__(self, index: int) -> PerformanceMetrics:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("metrics history index out of range")
+        slot = (self._head - self._count + index) % self.capacity
+        return PerformanceMetrics(**{
+            name: column[slot].item() for name, column in self.columns.items()
+        })
+    
+    def rows(self, n: Optional[int] = None) -> List[PerformanceMetrics]:
+        """The last ``n`` samples (all by default) as dataclasses, oldest first"""
+        k = self._count if n is None else min(n, self._count)
+        return [self[i] for i in range(self._count - k, self._count)]
+    
+    def to_dicts(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The last ``n`` samples (all by default) as dicts, oldest first"""
+        slots = self.slots(n)
+        names = list(self.columns)
+        # One tolist() per field instead of a conversion per value
+        values = [self.columns[name].take(slots).tolist() for name in names]
+        return [dict(zip(names, row)) for row in zip(*values)]
+    
+    def truncate(self, n: int) -> None:
+        """Forget all but the last ``n`` samples"""
+        self._count = min(self._count, n)
 
 @dataclass
 class OperationMetrics:
@@ -51,18 +159,47 @@ class OperationMetrics:
     cpu_after: float
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return {
+            'operation_name': self.operation_name,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'duration': self.duration,
+            'success': self.success,
+            'memory_before': self.memory_before,
+            'memory_after': self.memory_after,
+            'cpu_before': self.cpu_before,
+            'cpu_after': self.cpu_after
+        }
 
 class PerformanceMonitor:
     """Advanced performance monitoring and optimization"""
     
-    def __init__(self, workspace_path: Optional[Path] = None):
+    def __init__(self, workspace_path: Optional[Path] = None, tune_gc: bool = False,
+                 monitor_cpu: Optional[int] = None):
         self.workspace_path = workspace_path or Path.cwd()
-        self.metrics_history: List[PerformanceMetrics] = []
+        self.metrics_history = MetricsRing(1000)
         self.operation_history: List[OperationMetrics] = []
         self.monitoring_active = False
         self.monitoring_thread: Optional[threading.Thread] = None
         self.optimization_strategies: Dict[str, Callable] = {}
+        # Reused so cpu_percent() measures since the previous sample
+        self._process = psutil.Process()
+        # Separate handle for track_operation, whose cpu_percent() calls
+        # would otherwise shorten the monitoring loop's measurement window
+        self._operation_process = psutil.Process()
+        # Monitoring ticks so far, and the slow metrics last read
+        self._tick = 0
+        self._last_net: Optional[tuple] = None
+        self._last_open_files: Optional[int] = None
+        # RSS (MB) and monotonic time of the last forced collection
+        self._rss_at_last_gc = 0.0
+        self._last_gc_ts = 0.0
+        self._min_gc_interval = 30.0  # seconds
+        # Core the monitoring thread is pinned to (Linux): the last one this
+        # process may run on, away from the cores workers usually start on
+        if monitor_cpu is None and hasattr(os, 'sched_getaffinity'):
+            monitor_cpu = max(os.sched_getaffinity(0))
+        self._monitor_cpu = monitor_cpu
         
         # Initialize optimization strategies
         self._init_optimization_strategies()
@@ -73,7 +210,25 @@ class PerformanceMonitor:
             'memory_percent': 85.0,
             'operation_duration': 5.0,  # seconds
             'max_memory_growth': 100.0,  # MB
+            'slow_metric_every': 10,  # ticks between network / open-file reads
         }
+        
+        # Opt-in: collect the young generation less often and move everything
+        # alive now (including this monitor) out of the collector's view
+        self._gc_thresholds: Optional[tuple] = None
+        if tune_gc:
+            self._gc_thresholds = gc.get_threshold()
+            gc.collect(2)
+            gc.freeze()
+            gc.set_threshold(70000, 10, 10)
+    
+    def restore_gc(self):
+        """Undo the garbage collector tuning applied with ``tune_gc=True``"""
+        if self._gc_thresholds is None:
+            return
+        gc.unfreeze()
+        gc.set_threshold(*self._gc_thresholds)
+        self._gc_thresholds = None
     
     def _init_optimization_strategies(self):
         """Initialize performance optimization strategies"""
@@ -110,56 +265,82 @@ class PerformanceMonitor:
         logger.info("Performance monitoring stopped")
     
     def _monitoring_loop(self, interval: float):
-        """Main monitoring loop"""
+        """Main monitoring loop
+        
+        Samples are taken on a fixed schedule, so the time spent collecting
+        does not stretch the sampling period.
+        """
+        # On Linux both apply to the calling thread only, not the process
+        if sys.platform.startswith('linux'):
+            try:
+                if self._monitor_cpu is not None:
+                    os.sched_setaffinity(0, {self._monitor_cpu})
+                os.nice(10)
+            except (AttributeError, OSError) as e:
+                logger.debug(f"Could not pin or deprioritize the monitoring thread: {e}")
+        
+        deadline = time.monotonic()
         while self.monitoring_active:
             try:
                 metrics = self._collect_metrics()
+                # The ring keeps the last 1000 samples
                 self.metrics_history.append(metrics)
                 
-                # Keep only last 1000 metrics to prevent memory bloat
-                if len(self.metrics_history) > 1000:
-                    self.metrics_history = self.metrics_history[-1000:]
-                
                 # Check for performance issues
                 self._check_performance_alerts(metrics)
                 
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
             
-            time.sleep(interval)
+            self._tick += 1
+            deadline += interval
+            now = time.monotonic()
+            if now - deadline > _MAX_MISSED_INTERVALS * interval:
+                logger.warning(f"Performance monitoring fell {now - deadline:.2f}s behind, skipping missed samples")
+                deadline = now
+            time.sleep(max(0.0, deadline - now))
     
     def _collect_metrics(self) -> PerformanceMetrics:
         """Collect current system performance metrics"""
-        process = psutil.Process()
-        
-        # CPU and memory
-        cpu_percent = process.cpu_percent()
-        memory_info = process.memory_info()
-        memory_mb = memory_info.rss / 1024 / 1024
-        memory_percent = process.memory_percent()
-        
-        # I/O statistics
-        try:
-            io_counters = process.io_counters()
-            disk_io_read = io_counters.read_bytes
-            disk_io_write = io_counters.write_bytes
-        except (AttributeError, OSError):
-            disk_io_read = disk_io_write = 0
+        process = self._process
+        # Network counters and open files are costly and change slowly, so
+        # they are only re-read every few ticks
+        slow = self._last_net is None or \
+            self._tick % max(1, int(self.thresholds['slow_metric_every'])) == 0
+        
+        # Read the process's /proc entries once for all of its metrics
+        with process.oneshot():
+            # CPU and memory
+            cpu_percent = process.cpu_percent()
+            memory_info = process.memory_info()
+            memory_mb = memory_info.rss * _INV_MB
+            memory_percent = process.memory_percent()
+            
+            # I/O statistics
+            try:
+                io_counters = process.io_counters()
+                disk_io_read = io_counters.read_bytes
+                disk_io_write = io_counters.write_bytes
+            except (AttributeError, OSError):
+                disk_io_read = disk_io_write = 0
+            
+            # Thread and file counts
+            active_threads = process.num_threads()
+            if slow:
+                try:
+                    self._last_open_files = len(process.open_files())
+                except (AttributeError, OSError):
+                    self._last_open_files = 0
         
         # Network statistics (system-wide)
-        try:
-            net_io = psutil.net_io_counters()
-            network_sent = net_io.bytes_sent
-            network_recv = net_io.bytes_recv
-        except (AttributeError, OSError):
-            network_sent = network_recv = 0
-        
-        # Thread and file counts
-        active_threads = process.num_threads()
-        try:
-            open_files = len(process.open_files())
-        except (AttributeError, OSError):
-            open_files = 0
+        if slow:
+            try:
+                net_io = psutil.net_io_counters()
+                self._last_net = (net_io.bytes_sent, net_io.bytes_recv)
+            except (AttributeError, OSError):
+                self._last_net = (0, 0)
+        network_sent, network_recv = self._last_net
+        open_files = self._last_open_files
         
         return PerformanceMetrics(
             timestamp=time.time(),
@@ -174,6 +355,12 @@ class PerformanceMonitor:
             open_files=open_files
         )
     
+    def _collect_lightweight(self) -> Tuple[float, float]:
+        """(memory_mb, cpu_percent) of this process, without the other metrics"""
+        process = self._operation_process
+        with process.oneshot():
+            return process.memory_info().rss * _INV_MB, process.cpu_percent()
+    
     def _check_performance_alerts(self, metrics: PerformanceMetrics):
         """Check for performance issues and trigger optimizations"""
         alerts = []
@@ -204,12 +391,24 @@ class PerformanceMonitor:
     
     def _optimize_memory(self):
         """Memory optimization strategy"""
-        import gc
-        gc.collect()  # Force garbage collection
+        # A full collection can pause for a long time on a large heap, so only
+        # force one once RSS has doubled, and at most every _min_gc_interval
+        if self.metrics_history:
+            rss_mb = self.metrics_history.column('memory_mb', 1)[0].item()
+        else:
+            rss_mb = self._process.memory_info().rss * _INV_MB
+        now = time.monotonic()
+        if now - self._last_gc_ts > self._min_gc_interval and rss_mb > 2 * self._rss_at_last_gc:
+            gc.collect()
+            self._last_gc_ts = now
+            self._rss_at_last_gc = rss_mb
+            logger.info(f"Forced garbage collection at {rss_mb:.1f}MB RSS")
+        else:
+            logger.debug(f"Skipped garbage collection at {rss_mb:.1f}MB RSS "
+                         f"(last at {self._rss_at_last_gc:.1f}MB)")
         
         # Clear old metrics if too many
-        if len(self.metrics_history) > 500:
-            self.metrics_history = self.metrics_history[-500:]
+        self.metrics_history.truncate(500)
         
         if len(self.operation_history) > 200:
             self.operation_history = self.operation_history[-200:]
@@ -233,7 +432,7 @@ class PerformanceMonitor:
     async def track_operation(self, operation_name: str):
         """Context manager to track operation performance"""
         start_time = time.time()
-        start_metrics = self._collect_metrics()
+        memory_before, cpu_before = self._collect_lightweight()
         success = False
         
         try:
@@ -241,7 +440,7 @@ class PerformanceMonitor:
             success = True
         finally:
             end_time = time.time()
-            end_metrics = self._collect_metrics()
+            memory_after, cpu_after = self._collect_lightweight()
             duration = end_time - start_time
             
             operation_metrics = OperationMetrics(
@@ -250,10 +449,10 @@ class PerformanceMonitor:
                 end_time=end_time,
                 duration=duration,
                 success=success,
-                memory_before=start_metrics.memory_mb,
-                memory_after=end_metrics.memory_mb,
-                cpu_before=start_metrics.cpu_percent,
-                cpu_after=end_metrics.cpu_percent
+                memory_before=memory_before,
+                memory_after=memory_after,
+                cpu_before=cpu_before,
+                cpu_after=cpu_after
             )
             
             self.operation_history.append(operation_metrics)
@@ -262,7 +461,7 @@ class PerformanceMonitor:
             if duration > self.thresholds['operation_duration']:
                 logger.warning(f"Slow operation: {operation_name} took {duration:.2f}s")
             
-            memory_growth = end_metrics.memory_mb - start_metrics.memory_mb
+            memory_growth = memory_after - memory_before
             if memory_growth > self.thresholds['max_memory_growth']:
                 logger.warning(f"High memory growth in {operation_name}: {memory_growth:.1f}MB")
                 self._trigger_optimization('memory_cleanup')
@@ -272,21 +471,23 @@ class PerformanceMonitor:
         if not self.metrics_history:
             return {"status": "No metrics available"}
         
-        recent_metrics = self.metrics_history[-10:]  # Last 10 measurements
-        
-        avg_cpu = sum(m.cpu_percent for m in recent_metrics) / len(recent_metrics)
-        avg_memory = sum(m.memory_mb for m in recent_metrics) / len(recent_metrics)
-        avg_threads = sum(m.active_threads for m in recent_metrics) / len(recent_metrics)
+        # Last 10 measurements
+        history = self.metrics_history
+        avg_cpu = float(history.column('cpu_percent', 10).mean())
+        avg_memory = float(history.column('memory_mb', 10).mean())
+        avg_threads = float(history.column('active_threads', 10).mean())
         
         # Operation statistics
-        successful_ops = sum(1 for op in self.operation_history if op.success)
         total_ops = len(self.operation_history)
-        success_rate = successful_ops / total_ops if total_ops > 0 else 0
+        successes = np.fromiter((op.success for op in self.operation_history),
+                                dtype=bool, count=total_ops)
+        success_rate = float(successes.mean()) if total_ops > 0 else 0
         
-        slow_operations = [
-            op for op in self.operation_history[-50:]  # Last 50 operations
-            if op.duration > self.thresholds['operation_duration']
-        ]
+        recent_ops = self.operation_history[-50:]  # Last 50 operations
+        durations = np.fromiter((op.duration for op in recent_ops),
+                                dtype=np.float64, count=len(recent_ops))
+        slow_operations_count = int(np.count_nonzero(
+            durations > self.thresholds['operation_duration']))
         
         return {
             "system_performance": {
@@ -298,10 +499,8 @@ class PerformanceMonitor:
             "operation_performance": {
                 "total_operations": total_ops,
                 "success_rate": round(success_rate * 100, 1),
-                "slow_operations_count": len(slow_operations),
-                "avg_operation_time": round(
-                    sum(op.duration for op in self.operation_history[-20:]) / min(20, total_ops), 3
-                ) if total_ops > 0 else 0
+                "slow_operations_count": slow_operations_count,
+                "avg_operation_time": round(float(durations[-20:].mean()), 3) if total_ops > 0 else 0
             },
             "optimizations_applied": {
                 "monitoring_active": self.monitoring_active,
@@ -334,14 +533,16 @@ class PerformanceMonitor:
         
         export_data = {
             "summary": self.get_performance_summary(),
-            "metrics_history": [m.to_dict() for m in self.metrics_history[-100:]],  # Last 100
+            "metrics_history": self.metrics_history.to_dicts(100),  # Last 100
             "operation_history": [op.to_dict() for op in self.operation_history[-50:]],  # Last 50
             "export_timestamp": time.time(),
             "thresholds": self.thresholds
         }
         
-        with open(file_path, 'w') as f:
-            json.dump(export_data, f, indent=2)
+        if ORJSON_AVAILABLE:
+            file_path.write_bytes(orjson.dumps(export_data, option=orjson.OPT_INDENT_2))
+        else:
+            file_path.write_text(json.dumps(export_data, indent=2))
         
         logger.info(f"Performance metrics exported to {file_path}")
         return file_path
@@ -18,6 +18,8 @@ from typing import Dict, List, Optional, Any, Callable, Union
 from datetime import datetime, timezone
 from enum import Enum
 
+import numpy as np
+
 from memory_engine import MemoryEngine, MemoryConfig, MemoryContext
 
 
@@ -30,6 +32,15 @@ class TaskStatus(Enum):
     CANCELLED = "cancelled"
 
 
+@dataclass(slots=True)
+class TaskAgentPerf:
+    """Performance counters maintained in place by the task agent"""
+    average_task_time: float = 0.0
+    plugin_load_time: float = 0.0
+    queue_length: int = 0
+    active_threads: int = 0
+
+
 @dataclass
 class TaskResult:
     """Result of task execution"""
@@ -184,6 +195,64 @@ class TaskAgent:
         self.task_queue = TaskQueue()
         self._executor_running = False
         self._executor_task: Optional[asyncio.Task] = None
+        
+        # Performance counters, updated as tasks move through the queue
+        self.perf = TaskAgentPerf()
+        self._finished_tasks = 0
+        
+        # Finished-task history: one record per task, plus a columnar index
+        # sorted by creation time that is merged from pending entries lazily
+        self.execution_history: List[Dict[str, Any]] = []
+        self._pending_history: List[tuple] = []
+        self._history_created = np.empty(0, dtype=np.float64)
+        self._history_status = np.empty(0, dtype=object)
+    
+    @property
+    def history_created(self) -> np.ndarray:
+        """Creation timestamps of finished tasks, sorted ascending"""
+        self._flush_history()
+        return self._history_created
+    
+    @property
+    def history_status(self) -> np.ndarray:
+        """Statuses of finished tasks, parallel to ``history_created``"""
+        self._flush_history()
+        return self._history_status
+    
+    def _record_history(self, task: Task, result: TaskResult) -> None:
+        """Append a finished task to the execution history"""
+        created_at = task.created_at.timestamp()
+        self.execution_history.append({
+            'id': task.id,
+            'description': task.description,
+            'status': result.status.value,
+            'plugin': ','.join(task.plugin_chain) or 'unknown',
+            'workspace': self.config.workspace_path,
+            'execution_time': result.execution_time,
+            'created_at': created_at
+        })
+        self._pending_history.append((created_at, result.status.value))
+    
+    def _flush_history(self) -> None:
+        """Merge pending history entries into the sorted columnar index"""
+        if not self._pending_history:
+            return
+        
+        created = np.array([c for c, _ in self._pending_history], dtype=np.float64)
+        status = np.empty(len(self._pending_history), dtype=object)
+        status[:] = [s for _, s in self._pending_history]
+        self._pending_history.clear()
+        
+        created = np.concatenate((self._history_created, created))
+        status = np.concatenate((self._history_status, status))
+        order = np.argsort(created, kind='stable')
+        self._history_created = created[order]
+        self._history_status = status[order]
+    
+    def _update_queue_perf(self) -> None:
+        """Refresh queue-derived performance counters"""
+        self.perf.queue_length = self.task_queue.queue_size
+        self.perf.active_threads = self.task_queue.running_count
     
     async def start(self) -> None:
         """Start the task agent"""
@@ -232,6 +301,7 @@ class TaskAgent:
         task.context_id = context_id
         
         await self.task_queue.add_task(task)
+        self._update_queue_perf()
         return task.id
     
     async def get_task_status(self, task_id: str) -> Optional[TaskStatus]:
@@ -362,11 +432,12 @@ class TaskAgent:
                 # Execute task asynchronously
                 async_task = asyncio.create_task(self.execute_task_chain(task))
                 self.task_queue.add_running_task(task.id, async_task)
+                self._update_queue_perf()
                 
                 # Set up callback to handle completion
                 async_task.add_done_callback(
-                    lambda t, task_id=task.id: asyncio.create_task(
-                        self._handle_task_completion(task_id, t)
+                    lambda t, task=task: asyncio.create_task(
+                        self._handle_task_completion(task, t)
                     )
                 )
                 
@@ -374,7 +445,7 @@ class TaskAgent:
                 print(f"Error in task executor: {e}")
                 await asyncio.sleep(1.0)
     
-    async def _handle_task_completion(self, task_id: str, async_task: asyncio.Task) -> None:
+    async def _handle_task_completion(self, task: Task, async_task: asyncio.Task) -> None:
         """Handle task completion"""
         try:
             result = await async_task
@@ -382,16 +453,26 @@ class TaskAgent:
         except Exception as e:
             # Create error result
             error_result = TaskResult(
-                task_id=task_id,
+                task_id=task.id,
                 status=TaskStatus.FAILED,
                 output=None,
                 error=str(e)
             )
             self.task_queue.add_result(error_result)
+            result = error_result
+        
+        self._record_history(task, result)
+        self._finished_tasks += 1
+        self.perf.average_task_time += (
+            (result.execution_time - self.perf.average_task_time) / self._finished_tasks
+        )
+        self._update_queue_perf()
     
     def register_plugin(self, plugin: PluginBase) -> None:
         """Register a new plugin"""
+        start_time = time.perf_counter()
         self.plugin_manager.register_plugin(plugin)
+        self.perf.plugin_load_time += time.perf_counter() - start_time
     
     def list_plugins(self) -> List[str]:
         """List all available plugins"""
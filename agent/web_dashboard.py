@@ -13,6 +13,7 @@ import time
 import logging
 from typing import Dict, Any, Optional
 import threading
+from dataclasses import asdict
 from datetime import datetime, timedelta
 
 # Import NeuroForge components
@@ -236,8 +237,8 @@ class DashboardServer:
                 
                 # Convert to JSON-serializable format
                 self._dashboard_cache = {
-                    'memory_stats': dashboard_data.memory_stats.__dict__,
-                    'task_stats': dashboard_data.task_stats.__dict__,
+                    'memory_stats': asdict(dashboard_data.memory_stats),
+                    'task_stats': asdict(dashboard_data.task_stats),
                     'knowledge_graph_stats': dashboard_data.knowledge_graph_stats,
                     'performance_metrics': dashboard_data.performance_metrics,
                     'recommendations': dashboard_data.recommendations,
@@ -79,6 +79,19 @@ def test_knowledge_graph():
             neighborhood = graph.get_node_neighborhood(first_node, depth=2)
             print(f"  ✓ Node neighborhood size: {neighborhood['neighborhood_size']}")
         
+        # Similarity backends agree
+        from agent.knowledge_graph import NUMBA_AVAILABLE, SCIPY_AVAILABLE
+        for i, words in enumerate(['python patterns testing', 'python patterns design',
+                                   'design testing python', 'database schema migration']):
+            graph.add_memory_node(f'mem_similar_{i}', {'content': words})
+        node_ids = [nid for nid, concepts in graph._node_concepts.items() if concepts]
+        expected = graph._similarity_pairs_indexed(node_ids, 0.2)
+        if NUMBA_AVAILABLE:
+            assert graph._similarity_pairs_jit(node_ids, 0.2) == expected
+        if SCIPY_AVAILABLE:
+            assert graph._similarity_pairs_sparse(node_ids, 0.2) == expected
+        print(f"  ✓ Similarity rebuild found {graph.rebuild_similarity()} similar pairs")
+        
         # Export graph
         export_path = graph.export_graph()
         print(f"  ✓ Graph exported to: {export_path}")
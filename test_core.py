@@ -4,14 +4,21 @@ Simple test script for NeuroForge core components
 """
 
 import asyncio
+import json
 import sys
 import tempfile
+import uuid
+from dataclasses import asdict
+from datetime import datetime, timezone
 from pathlib import Path
 
 # Add the agent directory to the path
 sys.path.insert(0, str(Path(__file__).parent / "agent"))
 
-from memory_engine import MemoryEngine, MemoryConfig
+import lmdb
+import msgpack
+
+from memory_engine import MemoryEngine, MemoryConfig, MemoryContext, PersistentStore
 from task_agent import TaskAgent, EchoPlugin
 
 
@@ -38,6 +45,13 @@ async def test_memory_engine():
         memory = await engine.retrieve_memory(context_id)
         print(f"✅ Retrieved memory: {memory.content}")
         
+        # Content orjson cannot encode falls back to json
+        big_id = await engine.store_memory(content={"big": 2**70})
+        assert (await engine.retrieve_memory(big_id)).content == {"big": 2**70}
+        await engine.flush()
+        assert engine.persistent_store.get_context(big_id).content == {"big": 2**70}
+        print("✅ Stored and retrieved memory with a >64-bit integer")
+        
         # Test workspace context
         workspace_context = await engine.get_workspace_context()
         print(f"✅ Workspace context: {workspace_context['workspace_path']}")
@@ -50,6 +64,112 @@ async def test_memory_engine():
         print("✅ Memory engine test completed!\n")
 
 
+def test_context_encoding():
+    """Test that every LMDB record format decodes to the stored context"""
+    print("📦 Testing Memory Record Formats...")
+    
+    context = MemoryContext(
+        id=str(uuid.uuid4()),
+        content={"text": "héllo", 1: "intkey", "nested": {"list": [1, 2.5, None]}},
+        tags=["test", "ünicode"],
+        timestamp=datetime.now(timezone.utc),
+        session_id="session",
+        workspace_path=None,
+        git_hash="abc123",
+        content_size=42
+    )
+    
+    # Current binary format
+    value = PersistentStore._encode(context)
+    assert value[0] == 0xC1
+    assert PersistentStore._decode(value) == context
+    assert PersistentStore._decode(memoryview(value)) == context
+    
+    # MessagePack record, used for ids that are not canonical UUIDs
+    custom = MemoryContext(**{**asdict(context), "id": "custom-id"})
+    assert PersistentStore._decode(PersistentStore._encode(custom)) == custom
+    
+    # Older MessagePack and JSON records with ISO timestamps
+    data = asdict(context)
+    data["timestamp"] = context.timestamp.isoformat()
+    assert PersistentStore._decode(msgpack.packb(data, use_bin_type=True)) == context
+    decoded = PersistentStore._decode(json.dumps(data, default=str).encode())
+    assert decoded.content == {"text": "héllo", "1": "intkey", "nested": {"list": [1, 2.5, None]}}
+    assert decoded.timestamp == context.timestamp
+    print("✅ Binary, MessagePack and JSON records round-trip")
+    print("✅ Memory record format test completed!\n")
+
+
+async def test_memory_write_failure():
+    """Test that failed LMDB writes are reported and nothing is lost"""
+    print("💾 Testing Memory Write Failures...")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = MemoryConfig(
+            workspace_path=temp_dir,
+            memory_store_path="test_memory"
+        )
+        
+        engine = MemoryEngine(config)
+        store = engine.persistent_store
+        write_batch = store._write_batch
+        saved_ids = []
+        
+        for error in (lmdb.MapFullError("forced failure"), TypeError("forced failure")):
+            def failing_write_batch(contexts, error=error):
+                raise error
+            store._write_batch = failing_write_batch
+            
+            context_id = await engine.store_memory(content={"test": "unsaved"})
+            try:
+                await engine.flush()
+            except type(error):
+                pass
+            else:
+                raise AssertionError("flush() succeeded although the write failed")
+            
+            # The context is still readable, and the writer thread is still alive
+            assert store.get_context(context_id).content == {"test": "unsaved"}
+            store._write_batch = write_batch
+            await engine.flush()
+            saved_ids.append(context_id)
+        print("✅ Failed writes raised from flush() and were retried by the next flush")
+        
+        # A context that cannot be written does not hold back its batch
+        bad_id = await engine.store_memory(content={"test": "bad"})
+        good_id = await engine.store_memory(content={"test": "good"})
+        
+        def selective_write_batch(contexts):
+            if any(context.id == bad_id for context in contexts):
+                raise lmdb.BadValsizeError("forced failure")
+            write_batch(contexts)
+        store._write_batch = selective_write_batch
+        try:
+            await engine.flush()
+        except lmdb.BadValsizeError:
+            pass
+        else:
+            raise AssertionError("flush() succeeded although a write failed")
+        assert good_id not in store._pending
+        try:
+            engine.close()
+        except lmdb.Error:
+            pass
+        else:
+            raise AssertionError("close() succeeded although a context was not written")
+        print("✅ A failing context did not hold back the rest of its batch")
+        
+        # Everything else is on disk after reopening
+        engine = MemoryEngine(config)
+        for context_id in saved_ids + [good_id]:
+            memory = await engine.retrieve_memory(context_id)
+            assert memory is not None and memory.content["test"] in ("unsaved", "good")
+        assert await engine.retrieve_memory(bad_id) is None
+        engine.close()
+        print("✅ Retried contexts were persisted")
+        print("✅ Memory write failure test completed!\n")
+
+
 async def test_task_agent():
     """Test task agent functionality"""
     print("🤖 Testing Task Agent...")
@@ -116,6 +236,8 @@ async def main():
     
     try:
         await test_memory_engine()
+        test_context_encoding()
+        await test_memory_write_failure()
         await test_task_agent()
         
         print("🎉 All tests passed! NeuroForge core is working correctly.")
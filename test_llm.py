@@ -17,7 +17,7 @@ sys.path.insert(0, str(Path(__file__).parent / "agent"))
 
 # Import LLM components
 try:
-    from agent.llm_engine import LLMEngine, LLMConfig, LLMProvider, LLMCapability, LLMRequest
+    from agent.llm_engine import LLMEngine, LLMConfig, LLMProvider, LLMCapability, LLMRequest, MockProvider
     from agent.plugins.llm_code_analyzer import LLMCodeAnalyzer, AnalysisType
     from agent.plugins.llm_refactoring_assistant import LLMRefactoringAssistant, RefactoringType
     print("✅ LLM modules imported successfully")
@@ -69,6 +69,73 @@ async def test_llm_engine():
     return True
 
 
+class SlowMockProvider(MockProvider):
+    """Mock provider that takes a while to answer and counts its calls"""
+    
+    calls = 0
+    
+    async def generate_response(self, request):
+        SlowMockProvider.calls += 1
+        await asyncio.sleep(0.2)
+        return await super().generate_response(request)
+
+
+async def test_request_deduplication():
+    """Test that identical concurrent requests share one provider call"""
+    print("\n🔁 Testing Request Deduplication...")
+    
+    engine = LLMEngine()
+    engine.register_provider_class(LLMProvider.LOCAL, SlowMockProvider)
+    engine.register_provider(LLMConfig(provider=LLMProvider.LOCAL, model="slow-mock"),
+                             is_default=True)
+    engine.register_provider(LLMConfig(provider=LLMProvider.MOCK, model="mock-gpt-4"))
+    
+    def make_request():
+        return LLMRequest(prompt="Explain this function", capability=LLMCapability.CODE_ANALYSIS,
+                          code_context="def f(): pass")
+    
+    # Concurrent identical requests are served by a single call
+    SlowMockProvider.calls = 0
+    responses = await asyncio.gather(*(engine.generate_response(make_request()) for _ in range(3)))
+    assert SlowMockProvider.calls == 1, f"Expected one provider call, got {SlowMockProvider.calls}"
+    assert all(response.content == responses[0].content for response in responses)
+    
+    # Cancelling the first caller must not cancel the call others are waiting on
+    SlowMockProvider.calls = 0
+    first = asyncio.create_task(engine.generate_response(make_request()))
+    await asyncio.sleep(0.05)
+    second = asyncio.create_task(engine.generate_response(make_request()))
+    await asyncio.sleep(0.05)
+    first.cancel()
+    response = await second
+    assert first.cancelled()
+    assert response.content, "Remaining caller should still get a response"
+    assert SlowMockProvider.calls == 1
+    
+    # A hedged request cancelling its slow provider leaves joined callers alone
+    SlowMockProvider.calls = 0
+    joined = asyncio.create_task(engine.generate_response(make_request()))
+    await asyncio.sleep(0.05)
+    hedged = await engine.generate_response_hedged(
+        make_request(), [LLMProvider.LOCAL, LLMProvider.MOCK], hedge_delay=0.05)
+    assert hedged.metadata["provider"] == "mock"
+    response = await joined
+    assert response.content, "Caller joined to the hedged call should still get a response"
+    assert SlowMockProvider.calls == 1
+    
+    # Once every caller is cancelled, the provider call is cancelled too
+    lone = asyncio.create_task(engine.generate_response(make_request()))
+    await asyncio.sleep(0.05)
+    shared, = [inflight.task for inflight in engine._inflight.values()]
+    lone.cancel()
+    await asyncio.wait([lone, shared])
+    assert shared.cancelled(), "Abandoned provider call should be cancelled"
+    assert not engine._inflight
+    
+    print("✅ Identical requests deduplicated and cancellation isolated")
+    return True
+
+
 async def test_code_analyzer():
     """Test the LLM code analyzer plugin"""
     print("\n🔍 Testing LLM Code Analyzer...")
@@ -346,6 +413,7 @@ async def main():
     
     tests = [
         ("LLM Engine", test_llm_engine),
+        ("Request Deduplication", test_request_deduplication),
         ("Code Analyzer", test_code_analyzer),
         ("Refactoring Assistant", test_refactoring_assistant),
         ("Plugin Interfaces", test_plugin_interfaces),